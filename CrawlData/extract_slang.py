@@ -1,14 +1,25 @@
+import argparse
 import csv
+import io
+import os
 import re
 from collections import Counter
-# import argparse # Không cần dùng nữa
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 # Regex để tách từ (token)
 TOKEN_RE = re.compile(r'\b[a-zA-Z-]+\b')
+# 3+ ký tự lặp liên tiếp (biên dịch một lần thay vì mỗi token)
+REPEATED_CHAR_RE = re.compile(r'(.)\1{2,}')
 
 # Các cột văn bản mặc định cần xử lý
 DEFAULT_TEXT_COLUMNS = ['text', 'body', 'selftext', 'comment', 'content']
 
+# Kích thước mỗi khoảng byte giao cho một worker
+DEFAULT_CHUNK_MB = 32
+# Khối đọc khi dò ranh giới bản ghi
+_SCAN_BLOCK = 1 << 20
+
 def load_base_dict(filepath):
     """Tải từ điển cơ sở vào một set để tra cứu nhanh."""
     print(f"Loading base dictionary from {filepath}...")
@@ -18,15 +29,14 @@ def load_base_dict(filepath):
             return {line.strip().lower() for line in f}
     except FileNotFoundError:
         print(f"Error: Base dictionary file not found at {filepath}")
-        print("Please make sure 'base_dict_alternative.txt' is in the same directory.")
+        print("Please pass the dictionary with --dict (default: base_dict_alternative.txt).")
         return set()
 
 def canonicalize_token(token):
     """Chuẩn hóa token về dạng cơ bản (chữ thường, bỏ ký tự lặp)."""
     token = token.lower()
     # Thay thế 3+ ký tự lặp bằng 2 ký tự (ví dụ: heloooo -> heloo)
-    token = re.sub(r'(.)\1{2,}', r'\1\1', token)
-    return token
+    return REPEATED_CHAR_RE.sub(r'\1\1', token)
 
 def get_text_columns_indices(header):
     """Lấy chỉ số của các cột văn bản cần xử lý từ header."""
@@ -41,54 +51,197 @@ def get_text_columns_indices(header):
         return [1]
     return indices
 
-def main():
-    # --- CÁC THAM SỐ ĐÃ ĐƯỢC CÀI ĐẶT CỨNG ---
-    input_file = 'D:/CrawlData/reddit_data_nolinks.csv'
-    output_file = 'D:/CrawlData/slang_output.csv'
-    dict_file = 'base_dict_alternative.txt'
-    min_freq = 1
-    # --- KẾT THÚC PHẦN CÀI ĐẶT ---
+# --- Chia file thành các khoảng byte khớp ranh giới bản ghi CSV ---
+# Một ký tự xuống dòng là ranh giới bản ghi khi số dấu " đứng trước nó là
+# số chẵn (nằm ngoài trường được trích dẫn; "" bên trong trường vẫn giữ
+# tính chẵn lẻ). Đếm dấu " của từng khoảng chạy song song, cộng dồn lại cho
+# biết tính chẵn lẻ tại mỗi điểm cắt, rồi chỉ cần dò tới dòng kết thúc kế tiếp.
 
-    # Phần code `argparse` đã được loại bỏ.
-    
-    base_dict = load_base_dict(dict_file)
+def _count_quotes(path, start, end):
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(_SCAN_BLOCK, remaining))
+            if not block:
+                break
+            count += block.count(b'"')
+            remaining -= len(block)
+    return count
+
+def _next_record_start(f, offset, quotes_before, file_size):
+    """Vị trí bắt đầu bản ghi đầu tiên tại/sau offset (quotes_before: số dấu " trước offset)."""
+    f.seek(offset)
+    odd = quotes_before % 2 == 1
+    position = offset
+    while position < file_size:
+        block = f.read(_SCAN_BLOCK)
+        if not block:
+            break
+        start = 0
+        while True:
+            newline = block.find(b'\n', start)
+            if newline < 0:
+                odd ^= block.count(b'"', start) % 2 == 1
+                break
+            odd ^= block.count(b'"', start, newline) % 2 == 1
+            if not odd:
+                return position + newline + 1
+            start = newline + 1
+        position += len(block)
+    return file_size
+
+def split_record_ranges(path, data_start, chunk_bytes, pool=None):
+    """Các khoảng (start, end) byte từ data_start tới cuối file, mỗi khoảng gồm trọn các bản ghi."""
+    file_size = os.path.getsize(path)
+    cuts = list(range(data_start, file_size, chunk_bytes))[1:]
+    if not cuts:
+        return [(data_start, file_size)] if data_start < file_size else []
+
+    bounds = [data_start, *cuts, file_size]
+    spans = list(zip(bounds[:-1], bounds[1:]))
+    if pool is None:
+        quote_counts = [_count_quotes(path, start, end) for start, end in spans]
+    else:
+        quote_counts = list(pool.map(_count_quotes, [path] * len(spans), *zip(*spans)))
+
+    # Dấu " trong header (trước data_start) luôn là số chẵn
+    aligned = [data_start]
+    quotes_before = 0
+    with open(path, 'rb') as f:
+        for cut, quotes in zip(cuts, quote_counts):
+            quotes_before += quotes
+            record_start = _next_record_start(f, cut, quotes_before, file_size)
+            if record_start > aligned[-1]:
+                aligned.append(record_start)
+    aligned.append(file_size)
+    return [(start, end) for start, end in zip(aligned[:-1], aligned[1:]) if start < end]
+
+def read_header(path):
+    """(header, vị trí byte bắt đầu dữ liệu), hoặc (None, 0) nếu file rỗng."""
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        data_start = _next_record_start(f, 0, 0, file_size)
+        f.seek(0)
+        header_bytes = f.read(data_start)
+    rows = list(csv.reader(io.StringIO(header_bytes.decode('utf-8'), newline='')))
+    if not rows:
+        return None, 0
+    return rows[0], data_start
+
+# --- Đếm token trong một khoảng (chạy trong worker) ---
+
+def count_range(path, start, end, text_col_indices):
+    """(số dòng, Counter token thô) của các bản ghi trong [start, end)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+
+    raw_counts = Counter()
+    findall = TOKEN_RE.findall
+    rows = 0
+    for row in reader:
+        rows += 1
+        for col_idx in text_col_indices:
+            if col_idx < len(row):
+                raw_counts.update(findall(row[col_idx]))
+    return rows, raw_counts
+
+def slang_counts(raw_counts, base_dict):
+    """Lọc Counter token thô thành ứng viên slang (chữ thường), giữ thứ tự xuất hiện đầu tiên."""
+    candidates = Counter()
+    for token, count in raw_counts.items():
+        if not (2 < len(token) < 20):
+            continue
+        lower_token = token.lower()
+        if lower_token.isnumeric() or lower_token in base_dict:
+            continue
+        if canonicalize_token(lower_token) in base_dict:
+            continue
+        candidates[lower_token] += count
+    return candidates
+
+# Từ điển cơ sở của mỗi worker, nạp một lần qua initializer của pool
+_worker_base_dict = None
+
+def _init_worker(base_dict):
+    global _worker_base_dict
+    _worker_base_dict = base_dict
+
+def count_slang_range(path, text_col_indices, byte_range):
+    """(số dòng, Counter ứng viên slang) của khoảng byte_range = (start, end); chạy trong worker.
+
+    Lọc ngay trong worker để chỉ Counter ứng viên (nhỏ) được gửi về tiến
+    trình chính, thay vì Counter token thô của cả khoảng.
+    """
+    start, end = byte_range
+    rows, raw_counts = count_range(path, start, end, text_col_indices)
+    return rows, slang_counts(raw_counts, _worker_base_dict)
+
+def extract_slang(input_file, base_dict, workers=1, chunk_mb=DEFAULT_CHUNK_MB):
+    """(số dòng, Counter ứng viên slang) của cả file, chia khoảng cho process pool."""
+    header, data_start = read_header(input_file)
+    if header is None:
+        print("Input file is empty.")
+        return 0, Counter()
+
+    text_col_indices = get_text_columns_indices(header)
+    if not text_col_indices:
+        print("Error: Could not determine which column to process. Please check column names.")
+        return 0, Counter()
+
+    chunk_bytes = max(1, int(chunk_mb * (1 << 20)))
+    total_rows = 0
+    slang_candidates = Counter()
+    if workers <= 1:
+        ranges = split_record_ranges(input_file, data_start, chunk_bytes)
+        results = (count_range(input_file, start, end, text_col_indices) for start, end in ranges)
+        for rows, raw_counts in results:
+            total_rows += rows
+            slang_candidates.update(slang_counts(raw_counts, base_dict))
+        return total_rows, slang_candidates
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base_dict,)) as pool:
+        ranges = split_record_ranges(input_file, data_start, chunk_bytes, pool=pool)
+        print(f"Split into {len(ranges)} chunks for {workers} workers.")
+        results = pool.map(partial(count_slang_range, input_file, text_col_indices), ranges)
+        # pool.map trả kết quả theo thứ tự trong file (để most_common() xếp
+        # các tần suất bằng nhau giống hệt khi chạy tuần tự) và bỏ tham chiếu
+        # tới từng kết quả sau khi gộp, nên bộ nhớ không tăng theo cỡ file
+        for rows, candidates in results:
+            total_rows += rows
+            slang_candidates.update(candidates)
+    return total_rows, slang_candidates
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract slang candidates (words not in a base dictionary) from a CSV dump.")
+    parser.add_argument('input_file', help="Input CSV (e.g. reddit_data_nolinks.csv)")
+    parser.add_argument('-o', '--output', default='slang_output.csv', help="Output CSV (default: slang_output.csv)")
+    parser.add_argument('-d', '--dict', dest='dict_file', default='base_dict_alternative.txt',
+                        help="Base dictionary, one word per line (default: base_dict_alternative.txt)")
+    parser.add_argument('--min-freq', type=int, default=1, help="Minimum frequency to write (default: 1)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count; 1 = single process)")
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_MB,
+                        help=f"Bytes of input per task, in MB (default: {DEFAULT_CHUNK_MB})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_file = args.input_file
+    output_file = args.output
+    min_freq = args.min_freq
+
+    base_dict = load_base_dict(args.dict_file)
     if not base_dict:
         return
     print(f"Loaded {len(base_dict)} unique tokens into dictionary.")
 
-    slang_candidates = Counter()
-    total_rows = 0
-
     print(f"Processing {input_file}...")
     try:
-        with open(input_file, 'r', encoding='utf-8', newline='') as f:
-            reader = csv.reader(f)
-            try:
-                header = next(reader)
-            except StopIteration:
-                print("Input file is empty.")
-                return
-                
-            text_col_indices = get_text_columns_indices(header)
-            if not text_col_indices:
-                print("Error: Could not determine which column to process. Please check column names.")
-                return
-
-            for row in reader:
-                total_rows += 1
-                for col_idx in text_col_indices:
-                    if col_idx < len(row):
-                        text = row[col_idx]
-                        tokens = TOKEN_RE.findall(text)
-                        for token in tokens:
-                            if not (2 < len(token) < 20):
-                                continue
-                            
-                            lower_token = token.lower()
-                            canon_token = canonicalize_token(lower_token)
-                            
-                            if not lower_token.isnumeric() and lower_token not in base_dict and canon_token not in base_dict:
-                                slang_candidates[lower_token] += 1
+        total_rows, slang_candidates = extract_slang(input_file, base_dict, workers=args.workers, chunk_mb=args.chunk_mb)
     except FileNotFoundError:
         print(f"Error: Input file not found at {input_file}")
         return
@@ -99,15 +252,15 @@ def main():
     with open(output_file, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(['slang', 'frequency', 'canonical_form'])
-        
+
         count_written = 0
         for token, freq in slang_candidates.most_common():
             if freq >= min_freq:
                 canon_form = canonicalize_token(token)
                 writer.writerow([token, freq, canon_form])
                 count_written += 1
-    
+
     print(f"Wrote {count_written} slang words (frequency >= {min_freq}) to {output_file}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
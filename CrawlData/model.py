@@ -3,114 +3,1131 @@ Toxic Phrase Detection Model
 Detects toxic words/phrases in input sentences based on a slang dictionary.
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import numbers
+import os
+import pickle
 import re
-from typing import Dict, List, Tuple, Set
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Set
+
+
+def _is_word_char(char: str) -> bool:
+    """Mirror the `\\w` class of Python's `re` module for a single character."""
+    return char.isalnum() or char == '_'
+
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Return True where `\\b` would match in `text` at `index`."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of phrases.
+    
+    The automaton is built once and then finds every phrase occurrence in a
+    single left-to-right pass, independent of the number of phrases.
+    Matches are filtered to whole-word occurrences so the result is the same
+    as running `\\b<phrase>\\b` with `re.finditer` for every phrase.
+    """
+    
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Build the trie, failure links and output sets.
+        
+        Args:
+            phrases: Phrases to index (empty strings are ignored)
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+        self.size = 0
+        
+        for phrase in phrases:
+            if phrase:
+                self._add(phrase)
+        self._build_failure_links()
+    
+    def export_state(self) -> Tuple:
+        """Return the automaton tables as plain containers (for caching)."""
+        return (self._goto, self._fail, self._output, self.size)
+    
+    @classmethod
+    def from_state(cls, state: Tuple) -> 'PhraseAutomaton':
+        """Rebuild an automaton from export_state() output without recompiling."""
+        automaton = cls.__new__(cls)
+        automaton._goto, automaton._fail, automaton._output, automaton.size = state
+        return automaton
+    
+    def _add(self, phrase: str):
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if phrase not in self._output[state]:
+            self._output[state] = self._output[state] + (phrase,)
+            self.size += 1
+    
+    def _build_failure_links(self):
+        # Breadth-first so every failure target is finalized before it is used
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
+    
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Find every whole-word phrase occurrence in `text`.
+        
+        Occurrences of the same phrase never overlap (like `re.finditer`).
+        
+        Args:
+            text: Text to scan
+            
+        Returns:
+            List of (start position, phrase) sorted by position, longest
+            phrase first when several start at the same position
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matches = []
+        last_end = {}
+        state = 0
+        
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            
+            for phrase in output[state]:
+                end = index + 1
+                start = end - len(phrase)
+                if start < last_end.get(phrase, 0):
+                    continue
+                if _is_word_boundary(text, start) and _is_word_boundary(text, end):
+                    last_end[phrase] = end
+                    matches.append((start, phrase))
+        
+        matches.sort(key=lambda match: (match[0], -len(match[1])))
+        return matches
+
+
+_WORD_RUN_RE = re.compile(r'\w+')
+
+
+class TokenIndex:
+    """
+    Hash index for phrases that start and end with a word character.
+    
+    The sentence is split into word tokens (maximal `\\w` runs) once;
+    single-token phrases are resolved with one set lookup per token and
+    multi-token phrases ("you suck", "a-hole") with one hash lookup per
+    n-gram length starting at that token. The cost depends on the sentence
+    length and the longest phrase, not on the dictionary size.
+    
+    Phrases starting or ending with a non-word character (e.g. "@ss") do not
+    begin or end on a token boundary; they are listed in `unindexed` and must
+    be matched separately (DictionarySnapshot uses a small automaton for them).
+    """
+    
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Build the index.
+        
+        Args:
+            phrases: Phrases to index (empty strings are ignored)
+        """
+        self.unigrams: Set[str] = set()
+        self.ngrams: Set[str] = set()
+        # First token -> {token count: number of phrases}, for multi-word phrases
+        self._lengths: Dict[str, Dict[int, int]] = {}
+        self.unindexed: Set[str] = set()
+        for phrase in phrases:
+            if phrase:
+                self._add(phrase)
+        self._freeze()
+    
+    @staticmethod
+    def _tokens(phrase: str):
+        """Word tokens of `phrase`, or None if it does not start and end with one."""
+        if not (_is_word_char(phrase[0]) and _is_word_char(phrase[-1])):
+            return None
+        return _WORD_RUN_RE.findall(phrase)
+    
+    def _add(self, phrase: str):
+        tokens = self._tokens(phrase)
+        if tokens is None:
+            self.unindexed.add(phrase)
+        elif len(tokens) == 1:
+            self.unigrams.add(phrase)
+        elif phrase not in self.ngrams:
+            self.ngrams.add(phrase)
+            # Copied, not mutated: updated() shares these dicts with the original
+            counts = dict(self._lengths.get(tokens[0], {}))
+            counts[len(tokens)] = counts.get(len(tokens), 0) + 1
+            self._lengths[tokens[0]] = counts
+    
+    def _remove(self, phrase: str):
+        tokens = self._tokens(phrase)
+        if tokens is None:
+            self.unindexed.discard(phrase)
+        elif len(tokens) == 1:
+            self.unigrams.discard(phrase)
+        elif phrase in self.ngrams:
+            self.ngrams.discard(phrase)
+            counts = dict(self._lengths[tokens[0]])
+            counts[len(tokens)] -= 1
+            if not counts[len(tokens)]:
+                del counts[len(tokens)]
+            if counts:
+                self._lengths[tokens[0]] = counts
+            else:
+                del self._lengths[tokens[0]]
+    
+    def _freeze(self):
+        # Token counts to try after each first token, longest first so that
+        # matches at the same position come out in automaton order
+        self._first_token_lengths: Dict[str, Tuple[int, ...]] = {
+            token: tuple(sorted(counts, reverse=True)) for token, counts in self._lengths.items()
+        }
+    
+    def updated(self, added: Iterable[str], removed: Iterable[str]) -> 'TokenIndex':
+        """
+        Return a new index with phrases added/removed, leaving this one intact.
+        
+        Args:
+            added: Phrases that became toxic
+            removed: Phrases that are no longer toxic
+        """
+        index = TokenIndex.__new__(TokenIndex)
+        index.unigrams = set(self.unigrams)
+        index.ngrams = set(self.ngrams)
+        index._lengths = dict(self._lengths)
+        index.unindexed = set(self.unindexed)
+        for phrase in removed:
+            if phrase:
+                index._remove(phrase)
+        for phrase in added:
+            if phrase:
+                index._add(phrase)
+        index._freeze()
+        return index
+    
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Find every whole-word occurrence of an indexed phrase in `text`.
+        
+        Same result as PhraseAutomaton.find_all restricted to the indexed
+        phrases: an indexed phrase can only match from the start of a token
+        to the end of the token as many tokens later as it has, so the text
+        between those two positions is the only candidate to look up.
+        
+        Args:
+            text: Text to scan
+            
+        Returns:
+            List of (start position, phrase) sorted by position, longest
+            phrase first when several start at the same position
+        """
+        unigrams = self.unigrams
+        ngrams = self.ngrams
+        first_token_lengths = self._first_token_lengths
+        spans = [(match.start(), match.end(), match.group()) for match in _WORD_RUN_RE.finditer(text)]
+        matches = []
+        last_end = {}
+        
+        for i, (start, end, token) in enumerate(spans):
+            lengths = first_token_lengths.get(token)
+            if lengths is not None:
+                for n in lengths:
+                    if i + n > len(spans):
+                        continue
+                    phrase_end = spans[i + n - 1][1]
+                    candidate = text[start:phrase_end]
+                    # Occurrences of the same phrase never overlap
+                    if candidate in ngrams and start >= last_end.get(candidate, 0):
+                        last_end[candidate] = phrase_end
+                        matches.append((start, candidate))
+            if token in unigrams:
+                matches.append((start, token))
+        
+        return matches
+
+
+# Bump when the layout of the compiled dictionary cache changes
+COMPILED_CACHE_VERSION = 4
+_CACHE_NAME_RE = re.compile(r'(?P<stem>.*)-[0-9a-f]{16}-t(?P<threshold>.*)-v\d+\.pkl')
+
+# Common intentional misspellings, e.g. fuk -> fuck, fck -> fuck
+LEETSPEAK_MISSPELLINGS = {
+    'fuk': 'fuck',
+    'fck': 'fuck',
+    'f0ck': 'fuck',
+    'fock': 'fuck',
+    'phuck': 'fuck',
+    'sht': 'shit',
+    'shlt': 'shit',
+    'sh1t': 'shit',
+    'dmn': 'damn',
+    'hll': 'hell',
+    'h3ll': 'hell',
+    'btch': 'bitch',
+    'b1tch': 'bitch',
+    'azz': 'ass',
+    'a55': 'ass',
+    '@ss': 'ass',
+}
+
+# Common leetspeak and obfuscation patterns (order defines variation order)
+LEETSPEAK_REPLACEMENTS = {
+    '0': ['o'],
+    '1': ['i', 'l'],
+    '3': ['e'],
+    '4': ['a'],
+    '5': ['s'],
+    '7': ['t'],
+    '8': ['b'],
+    '@': ['a'],
+    '$': ['s'],
+    '!': ['i'],
+    '|': ['l', 'i'],
+}
+
+
+def _build_skeleton_table() -> Dict[int, str]:
+    # Fold every leet character and every letter it can stand for into one
+    # representative, so a word and any of its variations share a skeleton.
+    groups = [{char} | set(letters) for char, letters in LEETSPEAK_REPLACEMENTS.items()]
+    merged = []
+    for group in groups:
+        for other in [g for g in merged if g & group]:
+            merged.remove(other)
+            group |= other
+        merged.append(group)
+    return {ord(char): min(group) for group in merged for char in group}
+
+
+_SKELETON_TABLE = _build_skeleton_table()
+
+
+class ObfuscationIndex:
+    """
+    Canonical-skeleton index for resolving leetspeak/obfuscated words.
+    
+    Every toxic phrase (and every misspelling that corrects to one) is stored
+    under its skeleton, i.e. the string with leet characters and the letters
+    they may stand for folded together. A word is resolved with one
+    translate pass, one hash lookup and a linear check of the few entries
+    sharing its skeleton, instead of enumerating all of its variations.
+    
+    The result is the first toxic variation of the exhaustive expansion the
+    index replaces: each leet character is either kept or replaced by one of
+    its letters everywhere in the word (LEETSPEAK_REPLACEMENTS order), a
+    variation listed in LEETSPEAK_MISSPELLINGS is followed by its
+    correction, and candidates are ranked in that generation order.
+    """
+    
+    def __init__(self, toxic_phrases: Iterable[str]):
+        """
+        Build the index.
+        
+        Args:
+            toxic_phrases: Phrases considered toxic
+        """
+        toxic_phrases = set(toxic_phrases)
+        self._entries: Dict[str, List[Tuple[str, str, int]]] = {}
+        for phrase in toxic_phrases:
+            if phrase:
+                self._add(phrase, phrase, 0)
+        for misspelling, correct in LEETSPEAK_MISSPELLINGS.items():
+            if correct in toxic_phrases:
+                self._add(misspelling, correct, 1)
+    
+    def export_state(self) -> Dict[str, List[Tuple[str, str, int]]]:
+        """Return the index entries as plain containers (for caching)."""
+        return self._entries
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, List[Tuple[str, str, int]]]) -> 'ObfuscationIndex':
+        """Rebuild an index from export_state() output."""
+        index = cls.__new__(cls)
+        index._entries = state
+        return index
+    
+    def _add(self, source: str, target: str, is_correction: int):
+        skeleton = source.translate(_SKELETON_TABLE)
+        self._entries.setdefault(skeleton, []).append((source, target, is_correction))
+    
+    def updated(self, added: Iterable[str], removed: Iterable[str]) -> 'ObfuscationIndex':
+        """
+        Return a new index with phrases added/removed, leaving this one intact.
+        
+        Only the buckets touched by the change are copied.
+        
+        Args:
+            added: Phrases that became toxic
+            removed: Phrases that are no longer toxic
+        """
+        index = ObfuscationIndex.from_state(dict(self._entries))
+        entries = index._entries
+        removed = set(removed)
+        for phrase in removed:
+            sources = [phrase] + [m for m, correct in LEETSPEAK_MISSPELLINGS.items() if correct == phrase]
+            for source in sources:
+                skeleton = source.translate(_SKELETON_TABLE)
+                bucket = [entry for entry in entries.get(skeleton, ()) if entry[1] != phrase]
+                if bucket:
+                    entries[skeleton] = bucket
+                else:
+                    entries.pop(skeleton, None)
+        for phrase in added:
+            if not phrase:
+                continue
+            sources = [(phrase, 0)] + [(m, 1) for m, correct in LEETSPEAK_MISSPELLINGS.items() if correct == phrase]
+            for source, is_correction in sources:
+                skeleton = source.translate(_SKELETON_TABLE)
+                entries[skeleton] = entries.get(skeleton, []) + [(source, phrase, is_correction)]
+        return index
+    
+    @staticmethod
+    def _variation_rank(word: str, source: str):
+        """
+        Rank of `source` among the variations of `word`, or None if `word`
+        cannot be turned into `source` by consistent leet replacements.
+        """
+        choices = {}
+        for char, wanted in zip(word, source):
+            options = LEETSPEAK_REPLACEMENTS.get(char)
+            if options is None or char == wanted:
+                if char != wanted:
+                    return None
+                choice = 0
+            elif wanted in options:
+                choice = options.index(wanted) + 1
+            else:
+                return None
+            if choices.setdefault(char, choice) != choice:
+                return None
+        
+        # Variations are generated one leet character at a time: the list is
+        # kept as is and then followed by every entry with that character
+        # replaced by each of its letters in turn.
+        rank = 0
+        size = 1
+        for char, options in LEETSPEAK_REPLACEMENTS.items():
+            if char in choices:
+                if choices[char]:
+                    rank = size + rank * len(options) + choices[char] - 1
+                size *= len(options) + 1
+        return rank
+    
+    def lookup(self, word: str, accept=None):
+        """
+        Resolve an obfuscated word to the toxic phrase it stands for.
+        
+        Args:
+            word: Word stripped of punctuation (except @, $, !)
+            accept: Optional predicate on phrases; others are treated as if
+                they were not in the index
+            
+        Returns:
+            The matching toxic phrase, or None
+        """
+        entries = self._entries.get(word.translate(_SKELETON_TABLE))
+        if not entries:
+            return None
+        
+        best_key = None
+        best_target = None
+        for source, target, is_correction in entries:
+            if accept is not None and not accept(target):
+                continue
+            rank = self._variation_rank(word, source)
+            if rank is not None and (best_key is None or (rank, is_correction) < best_key):
+                best_key = (rank, is_correction)
+                best_target = target
+        return best_target
+
+
+class PhraseTable(Mapping):
+    """
+    Compact, read-only metadata store for toxic phrases.
+    
+    Every phrase gets an integer id; its canonical form, type and toxic
+    score live in packed arrays indexed by that id. Canonical forms and type
+    names are stored once in shared pools (and interned, so detectors in the
+    same process share the string objects). Per-phrase detail dicts are only
+    built when asked for.
+    
+    Each phrase also has a cutoff: the highest toxic_threshold at which some
+    dictionary row still makes it toxic (inf for 'negative' rows, root words
+    and added phrases). A dictionary loaded at a low threshold can then
+    answer for any higher threshold without being loaded again.
+    
+    The table is also a read-only Mapping of phrase -> {'canonical_form',
+    'type', 'toxic_score'}, like the dict of dicts it replaces.
+    """
+    
+    __slots__ = ('ids', 'strings', 'canonical_ids', 'type_codes', 'type_names', 'scores', 'cutoffs')
+    
+    def __init__(self, records: Iterable[Tuple[str, str, object, object, float]] = ()):
+        """
+        Build the table.
+        
+        Args:
+            records: (phrase, canonical_form, type, toxic_score, cutoff)
+                tuples; a later record for the same phrase replaces the
+                earlier one's details, and the phrase keeps the highest cutoff
+        """
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+        self.canonical_ids = array('i')
+        self.type_codes = array('H')
+        self.type_names: List = []
+        self.scores = array('q')
+        self.cutoffs = array('d')
+        self._append(records)
+    
+    def _append(self, records: Iterable[Tuple[str, str, object, object, float]]):
+        string_ids = {string: index for index, string in enumerate(self.strings)}
+        type_ids = {name: index for index, name in enumerate(self.type_names)}
+        for phrase, canonical, phrase_type, toxic_score, cutoff in records:
+            canonical_id = string_ids.get(canonical)
+            if canonical_id is None:
+                canonical_id = string_ids[canonical] = len(self.strings)
+                self.strings.append(sys.intern(canonical))
+            type_id = type_ids.get(phrase_type)
+            if type_id is None:
+                type_id = type_ids[phrase_type] = len(self.type_names)
+                self.type_names.append(sys.intern(phrase_type) if isinstance(phrase_type, str) else phrase_type)
+            if self.scores.typecode == 'q' and not isinstance(toxic_score, numbers.Integral):
+                # Keep integer scores as int; any other score switches to float
+                self.scores = array('d', self.scores)
+            previous_id = self.ids.get(phrase)
+            if previous_id is not None and self.cutoffs[previous_id] > cutoff:
+                cutoff = self.cutoffs[previous_id]
+            self.ids[sys.intern(phrase)] = len(self.canonical_ids)
+            self.canonical_ids.append(canonical_id)
+            self.type_codes.append(type_id)
+            self.scores.append(toxic_score)
+            self.cutoffs.append(cutoff)
+    
+    def export_state(self) -> Tuple:
+        """Return the table as plain containers (for caching)."""
+        return (self.ids, self.strings, self.canonical_ids, self.type_codes, self.type_names, self.scores,
+                self.cutoffs)
+    
+    @classmethod
+    def from_state(cls, state: Tuple) -> 'PhraseTable':
+        """Rebuild a table from export_state() output."""
+        table = cls.__new__(cls)
+        (table.ids, strings, table.canonical_ids, table.type_codes, table.type_names, table.scores,
+         table.cutoffs) = state
+        table.strings = [sys.intern(string) for string in strings]
+        table.ids = {sys.intern(phrase): phrase_id for phrase, phrase_id in table.ids.items()}
+        return table
+    
+    def updated(self, added: Dict[str, Dict] = None, removed: Iterable[str] = ()) -> 'PhraseTable':
+        """
+        Return a new table with phrases added/removed, leaving this one intact.
+        
+        Removed phrases only lose their id; their array slots stay unused
+        until the dictionary is rebuilt. Added phrases are toxic at any
+        threshold.
+        
+        Args:
+            added: Mapping of phrase -> phrase info (canonical_form, type, toxic_score)
+            removed: Phrases to drop
+        """
+        table = PhraseTable.__new__(PhraseTable)
+        table.ids = dict(self.ids)
+        table.strings = list(self.strings)
+        table.canonical_ids = array('i', self.canonical_ids)
+        table.type_codes = array('H', self.type_codes)
+        table.type_names = list(self.type_names)
+        table.scores = array(self.scores.typecode, self.scores)
+        table.cutoffs = array('d', self.cutoffs)
+        for phrase in removed:
+            table.ids.pop(phrase, None)
+        table._append(
+            (phrase, info['canonical_form'], info['type'], info['toxic_score'], math.inf)
+            for phrase, info in (added or {}).items()
+        )
+        return table
+    
+    def is_toxic_at(self, phrase: str, toxic_threshold) -> bool:
+        """Whether `phrase` is toxic for a detector with this toxic_threshold."""
+        phrase_id = self.ids.get(phrase)
+        return phrase_id is not None and self.cutoffs[phrase_id] >= toxic_threshold
+    
+    def record(self, phrase: str):
+        """(canonical_form, type, toxic_score) of `phrase`, or None if unknown."""
+        phrase_id = self.ids.get(phrase)
+        if phrase_id is None:
+            return None
+        return (
+            self.strings[self.canonical_ids[phrase_id]],
+            self.type_names[self.type_codes[phrase_id]],
+            self.scores[phrase_id],
+        )
+    
+    def __getitem__(self, phrase: str) -> Dict:
+        record = self.record(phrase)
+        if record is None:
+            raise KeyError(phrase)
+        return {'canonical_form': record[0], 'type': record[1], 'toxic_score': record[2]}
+    
+    def __contains__(self, phrase) -> bool:
+        return phrase in self.ids
+    
+    def __iter__(self):
+        return iter(self.ids)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _dictionary_statistics(toxic_df: pd.DataFrame) -> Dict:
+    """Statistics over the filtered dictionary rows, as reported by get_statistics()."""
+    return {
+        'total_entries': len(toxic_df),
+        'by_type': toxic_df['type'].value_counts().to_dict(),
+        'avg_toxic_score': toxic_df['toxic_score'].mean(),
+        'max_toxic_score': toxic_df['toxic_score'].max(),
+        'min_toxic_score': toxic_df['toxic_score'].min()
+    }
+
+
+class DictionarySnapshot:
+    """
+    Immutable compiled state of a toxic phrase dictionary.
+    
+    A detector reads its current snapshot once per call, so replacing the
+    snapshot (reload or incremental edit) never changes the dictionary under
+    a request that is already running.
+    
+    Incremental edits keep the base automaton: phrases added since it was
+    built are matched by a small overlay automaton and removed phrases are
+    filtered out of the base matches. `compacted()` folds the overlay back
+    into a single automaton.
+    
+    Attributes:
+        toxic_phrases (FrozenSet[str]): Phrases currently considered toxic
+        phrase_info (PhraseTable): Per-phrase canonical_form/type/toxic_score (read-only)
+        statistics (Dict): get_statistics() values of the dictionary rows the
+            snapshot was built from (None if unknown)
+        automaton (PhraseAutomaton): Base automaton
+        obfuscation_index (ObfuscationIndex): Skeleton index over toxic_phrases
+        token_index (TokenIndex): Token hash index over toxic_phrases (built on first use)
+        source_digest (str): SHA-256 of the CSV the snapshot was built from
+    """
+    
+    def __init__(self, toxic_phrases: Iterable[str], phrase_info: PhraseTable, statistics: Dict = None,
+                 automaton: PhraseAutomaton = None, obfuscation_index: ObfuscationIndex = None,
+                 source_digest: str = None, base_phrases: Iterable[str] = None,
+                 token_index: TokenIndex = None):
+        self.toxic_phrases = frozenset(toxic_phrases)
+        self.phrase_info = phrase_info
+        self.statistics = statistics
+        self.source_digest = source_digest
+        self.automaton = automaton if automaton is not None else PhraseAutomaton(self.toxic_phrases)
+        self.obfuscation_index = (
+            obfuscation_index if obfuscation_index is not None else ObfuscationIndex(self.toxic_phrases)
+        )
+        self.base_phrases = self.toxic_phrases if base_phrases is None else frozenset(base_phrases)
+        self.added_phrases = self.toxic_phrases - self.base_phrases
+        self.removed_phrases = self.base_phrases - self.toxic_phrases
+        self.overlay = PhraseAutomaton(self.added_phrases) if self.added_phrases else None
+        self._token_index = token_index
+        self._unindexed_automaton = None
+    
+    @property
+    def token_index(self) -> TokenIndex:
+        # Built on first use so automaton-only detectors never pay for it; a
+        # concurrent first use just builds an identical index twice
+        if self._token_index is None:
+            self._token_index = TokenIndex(self.toxic_phrases)
+        return self._token_index
+    
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """Same as PhraseAutomaton.find_all over the current toxic_phrases."""
+        matches = self.automaton.find_all(text)
+        if self.removed_phrases:
+            matches = [match for match in matches if match[1] not in self.removed_phrases]
+        if self.overlay is not None:
+            matches.extend(self.overlay.find_all(text))
+            matches.sort(key=lambda match: (match[0], -len(match[1])))
+        return matches
+    
+    def find_all_tokens(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Same result as find_all, using the token hash index.
+        
+        Phrases the index cannot hold (starting or ending with a non-word
+        character) are matched by an automaton over just those phrases.
+        """
+        token_index = self.token_index
+        matches = token_index.find_all(text)
+        if token_index.unindexed:
+            if self._unindexed_automaton is None:
+                self._unindexed_automaton = PhraseAutomaton(token_index.unindexed)
+            extra = self._unindexed_automaton.find_all(text)
+            if extra:
+                matches.extend(extra)
+                matches.sort(key=lambda match: (match[0], -len(match[1])))
+        return matches
+    
+    def with_changes(self, added: Dict[str, Dict] = None, removed: Iterable[str] = ()) -> 'DictionarySnapshot':
+        """
+        Return a new snapshot with phrases added and/or removed.
+        
+        Args:
+            added: Mapping of phrase -> phrase info (canonical_form, type, toxic_score)
+            removed: Phrases to drop
+            
+        Returns:
+            New snapshot sharing the base automaton with this one
+        """
+        added = added or {}
+        toxic_phrases = set(self.toxic_phrases)
+        for phrase in removed:
+            toxic_phrases.discard(phrase)
+        toxic_phrases.update(added)
+        phrase_info = self.phrase_info.updated(added=added, removed=removed)
+        
+        added_phrases = toxic_phrases - self.toxic_phrases
+        removed_phrases = self.toxic_phrases - toxic_phrases
+        obfuscation_index = self.obfuscation_index.updated(added=added_phrases, removed=removed_phrases)
+        token_index = None
+        if self._token_index is not None:
+            token_index = self._token_index.updated(added=added_phrases, removed=removed_phrases)
+        return DictionarySnapshot(
+            toxic_phrases, phrase_info, self.statistics,
+            automaton=self.automaton,
+            obfuscation_index=obfuscation_index,
+            source_digest=self.source_digest,
+            base_phrases=self.base_phrases,
+            token_index=token_index,
+        )
+    
+    def compacted(self) -> 'DictionarySnapshot':
+        """Return an equivalent snapshot with the overlay merged into the base automaton."""
+        if not self.added_phrases and not self.removed_phrases:
+            return self
+        return DictionarySnapshot(
+            self.toxic_phrases, self.phrase_info, self.statistics,
+            obfuscation_index=self.obfuscation_index,
+            source_digest=self.source_digest,
+            token_index=self._token_index,
+        )
 
 
 class ToxicPhraseDetector:
     """
     A model that detects toxic phrases in text based on a slang dictionary.
     
+    The compiled dictionary lives in an immutable DictionarySnapshot that is
+    swapped atomically on reload() or add_phrase()/remove_phrase(), so a
+    long-running process picks up dictionary edits without a restart.
+    The raw dictionary rows are not kept; load_toxic_data() reads them from
+    the CSV on demand.
+    
     Attributes:
         toxic_phrases (Set[str]): Set of toxic phrases loaded from the dictionary
-        toxic_data (pd.DataFrame): Full dataframe with toxic phrase information
+        phrase_info (PhraseTable): Per-phrase canonical_form/type/toxic_score
         toxic_threshold (int): Minimum toxic_score to consider a phrase toxic
+        automaton (PhraseAutomaton): Multi-pattern matcher built from toxic_phrases
+        obfuscation_index (ObfuscationIndex): Skeleton index for leetspeak variations
+        snapshot (DictionarySnapshot): Current compiled dictionary
     """
     
-    def __init__(self, slang_csv_path: str = "slang.csv", toxic_threshold: int = 3):
+    # Overlay size after which incremental edits rebuild the base automaton
+    MAX_OVERLAY_PHRASES = 256
+    # Phrase matchers selectable with match_mode; both give the same matches
+    MATCH_MODES = ('automaton', 'tokens')
+    
+    def __init__(self, slang_csv_path: str = "slang.csv", toxic_threshold: int = 3,
+                 use_cache: bool = True, cache_dir: str = None, verbose: bool = True,
+                 match_mode: str = 'automaton'):
         """
         Initialize the toxic phrase detector.
         
         Args:
             slang_csv_path: Path to the slang CSV file
             toxic_threshold: Minimum toxic_score to consider a phrase as toxic (default: 3)
+            use_cache: If True, load/store the compiled dictionary cache
+            cache_dir: Directory for the compiled dictionary cache
+                (default: a `.dictcache` directory next to the CSV)
+            verbose: If False, only errors are printed
+            match_mode: 'automaton' scans the sentence character by character;
+                'tokens' splits it into words once and resolves phrases with
+                hash lookups, so its cost does not depend on the dictionary size
         """
+        if match_mode not in self.MATCH_MODES:
+            raise ValueError(f"match_mode must be one of {self.MATCH_MODES}, got {match_mode!r}")
+        self.match_mode = match_mode
+        self.slang_csv_path = slang_csv_path
         self.toxic_threshold = toxic_threshold
-        self.toxic_phrases = set()
-        self.toxic_data = None
-        self.phrase_info = {}
-        self._load_toxic_phrases(slang_csv_path)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._source_signature = self._stat_source()
+        self.snapshot = self._load_toxic_phrases(slang_csv_path)
+    
+    @property
+    def toxic_phrases(self):
+        return self.snapshot.toxic_phrases
     
-    def _load_toxic_phrases(self, csv_path: str):
-        """Load toxic phrases from the CSV file."""
+    @property
+    def phrase_info(self) -> PhraseTable:
+        return self.snapshot.phrase_info
+    
+    @property
+    def automaton(self) -> PhraseAutomaton:
+        return self.snapshot.automaton
+    
+    @property
+    def obfuscation_index(self) -> ObfuscationIndex:
+        return self.snapshot.obfuscation_index
+    
+    def _load_toxic_phrases(self, csv_path: str) -> DictionarySnapshot:
+        """
+        Load toxic phrases from the CSV file.
+        
+        The compiled dictionary (phrases, phrase info, automaton and
+        obfuscation index) is cached in a binary file keyed by the CSV's
+        content hash and toxic_threshold, so only a changed CSV is parsed again.
+        """
         try:
-            df = pd.read_csv(csv_path)
+            with open(csv_path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
             
-            # Filter toxic phrases based on:
-            # 1. type == 'negative' OR
-            # 2. toxic_score >= threshold
-            toxic_df = df[
-                (df['type'] == 'negative') | 
-                (df['toxic_score'] >= self.toxic_threshold)
-            ]
+            cache_path = None
+            if self.use_cache:
+                cache_path = self._cache_path(csv_path, digest)
+                snapshot = self._load_compiled(cache_path, digest)
+                if snapshot is not None:
+                    if self.verbose:
+                        print(f"Loaded {len(snapshot.toxic_phrases)} unique toxic phrases from compiled cache {cache_path.name}")
+                    return snapshot
             
-            self.toxic_data = toxic_df
+            # pandas is only needed when the compiled cache misses
+            import pandas as pd
             
-            # Common toxic root words and their variations
-            # These will be added even if not explicitly in the dictionary
-            toxic_roots = {
-                'fuck': {'type': 'negative', 'score': 4},
-                'fck': {'type': 'negative', 'score': 4},
-                'shit': {'type': 'negative', 'score': 3},
-                'damn': {'type': 'negative', 'score': 3},
-                'hell': {'type': 'negative', 'score': 3},
-                'bitch': {'type': 'negative', 'score': 4},
-                'ass': {'type': 'negative', 'score': 3},
-                'bastard': {'type': 'negative', 'score': 3},
-                'crap': {'type': 'negative', 'score': 3},
-            }
-            
-            # Store both slang and canonical_form
-            for _, row in toxic_df.iterrows():
-                slang = str(row['slang']).lower().strip()
-                canonical = str(row['canonical_form']).lower().strip()
-                
-                self.toxic_phrases.add(slang)
-                if canonical != slang and pd.notna(canonical):
-                    self.toxic_phrases.add(canonical)
-                
-                # Store phrase info for detailed results
-                self.phrase_info[slang] = {
-                    'canonical_form': canonical,
-                    'type': row['type'],
-                    'toxic_score': row['toxic_score']
-                }
-                if canonical != slang and pd.notna(canonical):
-                    self.phrase_info[canonical] = {
-                        'canonical_form': canonical,
-                        'type': row['type'],
-                        'toxic_score': row['toxic_score']
-                    }
-                
-                # Extract root words from compound toxic phrases
-                # e.g., "fcks" -> add "fck", "buttfuck" -> add "fuck"
-                for root_word, root_info in toxic_roots.items():
-                    if root_word in slang:
-                        if root_word not in self.toxic_phrases:
-                            self.toxic_phrases.add(root_word)
-                            self.phrase_info[root_word] = {
-                                'canonical_form': root_word,
-                                'type': root_info['type'],
-                                'toxic_score': root_info['score']
-                            }
+            snapshot = self._compile_toxic_phrases(pd.read_csv(io.BytesIO(raw)), digest)
             
-            # Ensure all root words are included
-            for root_word, root_info in toxic_roots.items():
-                if root_word not in self.toxic_phrases:
-                    self.toxic_phrases.add(root_word)
-                    self.phrase_info[root_word] = {
-                        'canonical_form': root_word,
-                        'type': root_info['type'],
-                        'toxic_score': root_info['score']
-                    }
+            if cache_path is not None:
+                self._save_compiled(cache_path, snapshot)
             
-            print(f"Loaded {len(self.toxic_phrases)} unique toxic phrases from {len(toxic_df)} entries (including root words)")
+            if self.verbose:
+                print(f"Loaded {len(snapshot.toxic_phrases)} unique toxic phrases from {snapshot.statistics['total_entries']} entries (including root words)")
+            return snapshot
             
         except Exception as e:
             print(f"Error loading toxic phrases: {e}")
             raise
     
+    def load_toxic_data(self) -> pd.DataFrame:
+        """
+        Read the toxic rows of the dictionary CSV at this detector's threshold.
+        
+        The rows are not kept in memory (get_statistics() is precomputed in
+        the snapshot), so every call parses the file as it is on disk now.
+        Phrases added or removed with add_phrase()/remove_phrase() are not
+        in the file; phrase_info is the live dictionary.
+        """
+        import pandas as pd
+        
+        return self._filter_toxic_rows(pd.read_csv(self.slang_csv_path))
+    
+    def _filter_toxic_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Dictionary rows considered toxic at this detector's threshold."""
+        # Filter toxic phrases based on:
+        # 1. type == 'negative' OR
+        # 2. toxic_score >= threshold
+        return df[
+            (df['type'] == 'negative') | 
+            (df['toxic_score'] >= self.toxic_threshold)
+        ]
+    
+    def _compile_toxic_phrases(self, df: pd.DataFrame, digest: str = None) -> DictionarySnapshot:
+        """Build phrase sets, phrase info and matchers from the slang dataframe."""
+        import pandas as pd
+        
+        toxic_df = self._filter_toxic_rows(df)
+        
+        toxic_phrases = set()
+        # (phrase, canonical_form, type, toxic_score, cutoff); later records win
+        records = []
+        
+        # Common toxic root words and their variations
+        # These will be added even if not explicitly in the dictionary
+        toxic_roots = {
+            'fuck': {'type': 'negative', 'score': 4},
+            'fck': {'type': 'negative', 'score': 4},
+            'shit': {'type': 'negative', 'score': 3},
+            'damn': {'type': 'negative', 'score': 3},
+            'hell': {'type': 'negative', 'score': 3},
+            'bitch': {'type': 'negative', 'score': 4},
+            'ass': {'type': 'negative', 'score': 3},
+            'bastard': {'type': 'negative', 'score': 3},
+            'crap': {'type': 'negative', 'score': 3},
+        }
+        
+        # Store both slang and canonical_form
+        rows = zip(
+            toxic_df['slang'].tolist(),
+            toxic_df['canonical_form'].tolist(),
+            toxic_df['type'].tolist(),
+            toxic_df['toxic_score'].tolist(),
+        )
+        for raw_slang, raw_canonical, phrase_type, toxic_score in rows:
+            slang = str(raw_slang).lower().strip()
+            canonical = str(raw_canonical).lower().strip()
+            
+            toxic_phrases.add(slang)
+            if canonical != slang and pd.notna(canonical):
+                toxic_phrases.add(canonical)
+            
+            # Store phrase info for detailed results; the cutoff is the
+            # highest threshold at which this row still passes the filter
+            cutoff = math.inf if phrase_type == 'negative' else float(toxic_score)
+            records.append((slang, canonical, phrase_type, toxic_score, cutoff))
+            if canonical != slang and pd.notna(canonical):
+                records.append((canonical, canonical, phrase_type, toxic_score, cutoff))
+            
+            # Extract root words from compound toxic phrases
+            # e.g., "fcks" -> add "fck", "buttfuck" -> add "fuck"
+            for root_word, root_info in toxic_roots.items():
+                if root_word in slang:
+                    if root_word not in toxic_phrases:
+                        toxic_phrases.add(root_word)
+                        records.append((root_word, root_word, root_info['type'], root_info['score'], math.inf))
+        
+        # Ensure all root words are included
+        for root_word, root_info in toxic_roots.items():
+            if root_word not in toxic_phrases:
+                toxic_phrases.add(root_word)
+                records.append((root_word, root_word, root_info['type'], root_info['score'], math.inf))
+        
+        phrase_table = PhraseTable(records)
+        # Root words are toxic at any threshold, even when a low-scoring row
+        # for the same word was loaded first
+        for root_word in toxic_roots:
+            phrase_table.cutoffs[phrase_table.ids[root_word]] = math.inf
+        
+        return DictionarySnapshot(
+            toxic_phrases, phrase_table, _dictionary_statistics(toxic_df), source_digest=digest
+        )
+    
+    def _cache_path(self, csv_path: str, digest: str) -> Path:
+        """Path of the compiled cache for this CSV content and threshold."""
+        cache_dir = Path(self.cache_dir) if self.cache_dir else Path(csv_path).resolve().parent / '.dictcache'
+        return cache_dir / f"{Path(csv_path).stem}-{digest[:16]}-t{self.toxic_threshold}-v{COMPILED_CACHE_VERSION}.pkl"
+    
+    def _load_compiled(self, cache_path: Path, digest: str):
+        """Load the compiled dictionary from cache_path; return None on a miss."""
+        try:
+            with open(cache_path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable dictionary cache {cache_path}: {e}")
+            return None
+        
+        if payload.get('version') != COMPILED_CACHE_VERSION or payload.get('digest') != digest:
+            return None
+        
+        return DictionarySnapshot(
+            payload['toxic_phrases'],
+            PhraseTable.from_state(payload['phrase_info']),
+            payload['statistics'],
+            automaton=PhraseAutomaton.from_state(payload['automaton']),
+            obfuscation_index=ObfuscationIndex.from_state(payload['obfuscation_index']),
+            source_digest=digest,
+        )
+    
+    def _save_compiled(self, cache_path: Path, snapshot: DictionarySnapshot):
+        """Write the compiled dictionary to cache_path atomically."""
+        payload = {
+            'version': COMPILED_CACHE_VERSION,
+            'digest': snapshot.source_digest,
+            'toxic_phrases': sorted(snapshot.toxic_phrases),
+            'phrase_info': snapshot.phrase_info.export_state(),
+            'statistics': snapshot.statistics,
+            'automaton': snapshot.automaton.export_state(),
+            'obfuscation_index': snapshot.obfuscation_index.export_state(),
+        }
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not write dictionary cache {cache_path}: {e}")
+            return
+        self._remove_stale_caches(cache_path)
+    
+    def _remove_stale_caches(self, cache_path: Path):
+        """
+        Delete compiled caches of older contents or formats of the same CSV and threshold.
+        
+        Every reload/edit of a changed CSV writes a new cache file, so a
+        long-running process would otherwise fill the cache directory.
+        Caches of other CSVs and other thresholds are kept.
+        """
+        # <csv stem>-<digest[:16]>-t<threshold>-v<format>.pkl, see _cache_path()
+        parts = _CACHE_NAME_RE.fullmatch(cache_path.name)
+        if parts is None:
+            return
+        pattern = re.compile(
+            rf"{re.escape(parts['stem'])}-[0-9a-f]{{16}}-t{re.escape(parts['threshold'])}-v\d+\.pkl"
+        )
+        for path in cache_path.parent.iterdir():
+            if path.name != cache_path.name and pattern.fullmatch(path.name):
+                try:
+                    path.unlink()
+                except OSError:
+                    # Still open elsewhere (Windows) or already gone
+                    pass
+    
+    def _stat_source(self):
+        """(mtime, size) of the dictionary source, or None if it is missing."""
+        try:
+            stat = os.stat(self.slang_csv_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _swap(self, snapshot: DictionarySnapshot):
+        # Compact once the overlay gets large so matching stays single-pass
+        overlay_size = len(snapshot.added_phrases) + len(snapshot.removed_phrases)
+        if overlay_size > self.MAX_OVERLAY_PHRASES:
+            snapshot = snapshot.compacted()
+        self.snapshot = snapshot
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild the dictionary from the CSV and swap it in atomically.
+        
+        Phrases added or removed through add_phrase()/remove_phrase() are
+        replaced by the CSV contents. Detection keeps running on the old
+        snapshot until the new one is ready.
+        
+        Args:
+            force: Rebuild even if the CSV content hash did not change
+            
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        self._source_signature = self._stat_source()
+        if not force:
+            with open(self.slang_csv_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if digest == self.snapshot.source_digest:
+                return False
+        
+        snapshot = self._load_toxic_phrases(self.slang_csv_path)
+        with self._lock:
+            self.snapshot = snapshot
+        return True
+    
+    def add_phrase(self, phrase: str, canonical_form: str = None, phrase_type: str = 'negative',
+                   toxic_score: int = 4):
+        """
+        Add a toxic phrase without rebuilding the whole dictionary.
+        
+        Args:
+            phrase: Phrase to add
+            canonical_form: Canonical form (defaults to the phrase itself)
+            phrase_type: Phrase type stored in the details
+            toxic_score: Toxic score stored in the details
+        """
+        phrase = str(phrase).lower().strip()
+        canonical = str(canonical_form).lower().strip() if canonical_form else phrase
+        info = {'canonical_form': canonical, 'type': phrase_type, 'toxic_score': toxic_score}
+        with self._lock:
+            self._swap(self.snapshot.with_changes(added={phrase: info}))
+    
+    def remove_phrase(self, phrase: str):
+        """
+        Remove a toxic phrase without rebuilding the whole dictionary.
+        
+        Args:
+            phrase: Phrase to remove
+        """
+        phrase = str(phrase).lower().strip()
+        with self._lock:
+            if phrase in self.snapshot.toxic_phrases:
+                self._swap(self.snapshot.with_changes(removed=[phrase]))
+    
+    def start_watching(self, interval: float = 5.0):
+        """
+        Watch the dictionary CSV in a background thread and reload on change.
+        
+        Args:
+            interval: Seconds between checks of the file's mtime and size
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name='slang-dictionary-watcher', daemon=True
+        )
+        self._watcher.start()
+    
+    def stop_watching(self):
+        """Stop the background dictionary watcher."""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+    
+    def _watch_loop(self, interval: float):
+        while not self._stop_watching.wait(interval):
+            signature = self._stat_source()
+            if signature is None or signature == self._source_signature:
+                continue
+            try:
+                if self.reload() and self.verbose:
+                    print(f"Reloaded toxic phrase dictionary from {self.slang_csv_path}")
+            except Exception as e:
+                # Keep serving the previous snapshot
+                print(f"Dictionary reload failed, keeping previous version: {e}")
+    
     def _tokenize_and_normalize(self, text: str) -> str:
         """
         Normalize and prepare text for detection.
@@ -127,88 +1144,16 @@ class ToxicPhraseDetector:
         text = re.sub(r'\s+', ' ', text).strip()
         return text
     
-    def _expand_leetspeak_variations(self, text: str) -> List[str]:
-        """
-        Generate variations of text to catch leetspeak/intentional misspellings.
-        
-        Args:
-            text: Input text
-            
-        Returns:
-            List of text variations
-        """
-        variations = [text]
-        
-        # First, check for common intentional misspellings
-        # fuk -> fuck, fck -> fuck
-        misspelling_map = {
-            'fuk': 'fuck',
-            'fck': 'fuck',
-            'f0ck': 'fuck',
-            'fock': 'fuck',
-            'phuck': 'fuck',
-            'sht': 'shit',
-            'shlt': 'shit',
-            'sh1t': 'shit',
-            'dmn': 'damn',
-            'hll': 'hell',
-            'h3ll': 'hell',
-            'btch': 'bitch',
-            'b1tch': 'bitch',
-            'azz': 'ass',
-            'a55': 'ass',
-            '@ss': 'ass',
-        }
-        
-        # Check if any misspelling pattern matches
-        for misspell, correct in misspelling_map.items():
-            if text == misspell:
-                if correct not in variations:
-                    variations.append(correct)
-        
-        # Common leetspeak and obfuscation patterns
-        replacements = {
-            '0': ['o'],
-            '1': ['i', 'l'],
-            '3': ['e'],
-            '4': ['a'],
-            '5': ['s'],
-            '7': ['t'],
-            '8': ['b'],
-            '@': ['a'],
-            '$': ['s'],
-            '!': ['i'],
-            '|': ['l', 'i'],
-        }
-        
-        # Apply each replacement
-        current_variations = [text]
-        
-        for char, replacements_list in replacements.items():
-            if char in text:
-                new_variations = []
-                for var in current_variations:
-                    for replacement in replacements_list:
-                        new_var = var.replace(char, replacement)
-                        if new_var not in variations:
-                            variations.append(new_var)
-                            # Check if this new variation maps to a known word
-                            if new_var in misspelling_map:
-                                correct_form = misspelling_map[new_var]
-                                if correct_form not in variations:
-                                    variations.append(correct_form)
-                            new_variations.append(new_var)
-                current_variations.extend(new_variations)
-        
-        return variations
-    
-    def detect(self, sentence: str, return_details: bool = False) -> Dict:
+    def detect(self, sentence: str, return_details: bool = False, toxic_threshold: float = None) -> Dict:
         """
         Detect toxic phrases in a sentence.
         
         Args:
             sentence: Input sentence to analyze
             return_details: If True, return detailed information about each toxic phrase
+            toxic_threshold: Threshold for this call only (default: the
+                detector's); must not be lower than the one the dictionary
+                was loaded with
             
         Returns:
             Dictionary with:
@@ -217,38 +1162,108 @@ class ToxicPhraseDetector:
                 - toxic_phrases (List[str]): List of toxic phrases found
                 - details (List[Dict]): Detailed info about each phrase (if return_details=True)
         """
+        toxic_threshold = self._effective_threshold(toxic_threshold)
+        snapshot = self.snapshot
         normalized_sentence = self._tokenize_and_normalize(sentence)
+        matches = self._find_matches(snapshot, normalized_sentence)
+        return self._build_result(snapshot, normalized_sentence, matches, return_details,
+                                  toxic_threshold=toxic_threshold)
+    
+    def _effective_threshold(self, toxic_threshold):
+        """
+        Validate a per-call toxic_threshold.
+        
+        Returns:
+            The threshold, or None when it selects the same phrases as the
+            loaded dictionary (no filtering needed)
+            
+        Raises:
+            ValueError: If the threshold is below the detector's toxic_threshold
+        """
+        if toxic_threshold is None or toxic_threshold == self.toxic_threshold:
+            return None
+        if toxic_threshold < self.toxic_threshold:
+            raise ValueError(
+                f"toxic_threshold {toxic_threshold} is below {self.toxic_threshold}, the threshold "
+                f"the dictionary was loaded with; load the detector with the lowest threshold needed"
+            )
+        return toxic_threshold
+    
+    def _find_matches(self, snapshot: DictionarySnapshot, text: str) -> List[Tuple[int, str]]:
+        """Whole-word phrase matches in `text` using the configured match_mode."""
+        if self.match_mode == 'tokens':
+            return snapshot.find_all_tokens(text)
+        return snapshot.find_all(text)
+    
+    def _match_obfuscated_word(self, clean_word: str, snapshot: DictionarySnapshot = None,
+                               toxic_threshold: float = None):
+        """
+        Return the toxic phrase a leetspeak/obfuscated word resolves to.
         
+        Args:
+            clean_word: Word stripped of punctuation (except @, $, !)
+            snapshot: Dictionary snapshot to use (default: the current one)
+            toxic_threshold: Only resolve to phrases toxic at this threshold
+                (None: every loaded phrase)
+            
+        Returns:
+            The matching variation, or None if no variation is toxic
+        """
+        snapshot = snapshot or self.snapshot
+        if toxic_threshold is None:
+            return snapshot.obfuscation_index.lookup(clean_word)
+        phrase_info = snapshot.phrase_info
+        return snapshot.obfuscation_index.lookup(
+            clean_word, accept=lambda phrase: phrase_info.is_toxic_at(phrase, toxic_threshold)
+        )
+    
+    def _build_result(self, snapshot: DictionarySnapshot, normalized_sentence: str,
+                      matches: List[Tuple[int, str]], return_details: bool,
+                      obfuscation_cache: Dict = None, toxic_threshold: float = None) -> Dict:
+        """
+        Turn automaton matches for one normalized sentence into a detection result.
+        
+        Args:
+            snapshot: Dictionary snapshot the matches came from
+            normalized_sentence: Sentence after _tokenize_and_normalize
+            matches: (position, phrase) pairs from DictionarySnapshot.find_all
+            return_details: If True, include detailed information about each phrase
+            obfuscation_cache: Optional dict memoizing _match_obfuscated_word per word
+            toxic_threshold: Threshold from _effective_threshold; matches of
+                phrases that are not toxic at it are ignored
+            
+        Returns:
+            Detection result in the format returned by detect()
+        """
+        phrase_info = snapshot.phrase_info
+        if toxic_threshold is not None:
+            matches = [match for match in matches if phrase_info.is_toxic_at(match[1], toxic_threshold)]
         found_toxic_phrases = []
         phrase_details = []
         detected_positions = set()  # Track positions to avoid duplicates
         
-        # Check for each toxic phrase in the sentence
-        # Use word boundaries to avoid partial matches
-        for phrase in self.toxic_phrases:
-            # Create pattern with word boundaries
-            pattern = r'\b' + re.escape(phrase) + r'\b'
-            matches = re.finditer(pattern, normalized_sentence)
-            
-            for match in matches:
-                position = match.start()
-                # Avoid counting the same position multiple times
-                if position not in detected_positions:
-                    detected_positions.add(position)
-                    found_toxic_phrases.append(phrase)
-                    if return_details and phrase in self.phrase_info:
+        # The automaton only reports whole-word matches; when several phrases
+        # start at the same position the longest one is reported first.
+        for position, phrase in matches:
+            # Avoid counting the same position multiple times
+            if position not in detected_positions:
+                detected_positions.add(position)
+                found_toxic_phrases.append(phrase)
+                if return_details:
+                    record = phrase_info.record(phrase)
+                    if record is not None:
                         phrase_details.append({
                             'phrase': phrase,
                             'position': position,
-                            'canonical_form': self.phrase_info[phrase]['canonical_form'],
-                            'type': self.phrase_info[phrase]['type'],
-                            'toxic_score': self.phrase_info[phrase]['toxic_score']
+                            'canonical_form': record[0],
+                            'type': record[1],
+                            'toxic_score': record[2]
                         })
         
         # Also check for leetspeak/obfuscated variations
         # Split sentence into words to check each word
         words = normalized_sentence.split()
-        for word_idx, word in enumerate(words):
+        for word in words:
             # Skip if already detected
             word_position = normalized_sentence.find(word)
             if word_position in detected_positions:
@@ -258,27 +1273,28 @@ class ToxicPhraseDetector:
             clean_word = re.sub(r'[^\w@$!]', '', word)  # Keep @, $, ! for leetspeak
             
             # Check variations
-            variations = self._expand_leetspeak_variations(clean_word)
-            for variation in variations:
-                if variation in self.toxic_phrases:
-                    detected_positions.add(word_position)
-                    found_toxic_phrases.append(clean_word)  # Use original word
-                    if return_details:
-                        # Use the info from the matched variation
-                        phrase_info = self.phrase_info.get(variation, {
-                            'canonical_form': variation,
-                            'type': 'negative',
-                            'toxic_score': 3
-                        })
-                        phrase_details.append({
-                            'phrase': clean_word,
-                            'matched_as': variation,
-                            'position': word_position,
-                            'canonical_form': phrase_info['canonical_form'],
-                            'type': phrase_info['type'],
-                            'toxic_score': phrase_info['toxic_score']
-                        })
-                    break  # Found a match, no need to check other variations
+            if obfuscation_cache is None:
+                variation = self._match_obfuscated_word(clean_word, snapshot, toxic_threshold)
+            elif clean_word in obfuscation_cache:
+                variation = obfuscation_cache[clean_word]
+            else:
+                variation = self._match_obfuscated_word(clean_word, snapshot, toxic_threshold)
+                obfuscation_cache[clean_word] = variation
+            
+            if variation is not None:
+                detected_positions.add(word_position)
+                found_toxic_phrases.append(clean_word)  # Use original word
+                if return_details:
+                    # Use the info from the matched variation
+                    record = phrase_info.record(variation) or (variation, 'negative', 3)
+                    phrase_details.append({
+                        'phrase': clean_word,
+                        'matched_as': variation,
+                        'position': word_position,
+                        'canonical_form': record[0],
+                        'type': record[1],
+                        'toxic_score': record[2]
+                    })
         
         result = {
             'is_toxic': len(found_toxic_phrases) > 0,
@@ -291,17 +1307,83 @@ class ToxicPhraseDetector:
         
         return result
     
-    def batch_detect(self, sentences: List[str]) -> List[Dict]:
+    def batch_detect(self, sentences: List[str], return_details: bool = False,
+                     toxic_threshold=None) -> pd.DataFrame:
         """
         Detect toxic phrases in multiple sentences.
         
+        The whole batch is normalized at once, identical sentences are
+        analyzed only once, and all unique sentences are scanned in a single
+        matching pass. Obfuscated-word lookups are shared across the batch.
+        
         Args:
             sentences: List of sentences to analyze
+            return_details: If True, add a 'details' column
+            toxic_threshold: Threshold for this call (see detect()), or one
+                threshold per sentence; the matching pass is shared either way
             
         Returns:
-            List of detection results for each sentence
+            DataFrame aligned with `sentences` with columns is_toxic,
+            toxic_count, toxic_phrases (and details if return_details=True)
         """
-        return [self.detect(sentence) for sentence in sentences]
+        import numpy as np
+        import pandas as pd
+        
+        columns = ['is_toxic', 'toxic_count', 'toxic_phrases']
+        if return_details:
+            columns.append('details')
+        if len(sentences) == 0:
+            return pd.DataFrame(columns=columns)
+        snapshot = self.snapshot
+        
+        normalized = (
+            pd.Series(sentences, dtype=object).astype(str)
+            .str.lower()
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip()
+        )
+        codes, unique_sentences = pd.factorize(normalized)
+        
+        # Scan all unique sentences in one pass. Newlines never survive
+        # normalization and are non-word characters, so joining on them keeps
+        # the word-boundary semantics of each sentence intact.
+        joined = '\n'.join(unique_sentences)
+        offsets = np.cumsum([0] + [len(text) + 1 for text in unique_sentences[:-1]])
+        matches = self._find_matches(snapshot, joined)
+        matches_by_sentence = [[] for _ in range(len(unique_sentences))]
+        if matches:
+            starts = np.fromiter((position for position, _ in matches), dtype=np.int64, count=len(matches))
+            owners = np.searchsorted(offsets, starts, side='right') - 1
+            for owner, (position, phrase) in zip(owners.tolist(), matches):
+                matches_by_sentence[owner].append((position - int(offsets[owner]), phrase))
+        
+        # One result per distinct (sentence, threshold); obfuscated-word
+        # lookups depend on the threshold, so each one gets its own memo
+        if toxic_threshold is None or np.isscalar(toxic_threshold):
+            thresholds = [self._effective_threshold(toxic_threshold)] * len(sentences)
+        else:
+            if len(toxic_threshold) != len(sentences):
+                raise ValueError("toxic_threshold must be a scalar or have one value per sentence")
+            thresholds = [self._effective_threshold(threshold) for threshold in toxic_threshold]
+        result_ids = {}
+        result_codes = []
+        for key in zip(codes.tolist(), thresholds):
+            result_id = result_ids.get(key)
+            if result_id is None:
+                result_id = result_ids[key] = len(result_ids)
+            result_codes.append(result_id)
+        
+        obfuscation_caches = {}
+        unique_results = [
+            self._build_result(snapshot, unique_sentences[code], matches_by_sentence[code], return_details,
+                               obfuscation_caches.setdefault(threshold, {}), threshold)
+            for code, threshold in result_ids
+        ]
+        
+        # Expand unique results back to the input order; duplicate sentences
+        # share the same result row.
+        unique_frame = pd.DataFrame(unique_results, columns=columns)
+        return unique_frame.take(result_codes).reset_index(drop=True)
     
     def get_statistics(self) -> Dict:
         """
@@ -310,17 +1392,15 @@ class ToxicPhraseDetector:
         Returns:
             Dictionary with statistics
         """
-        if self.toxic_data is None:
+        snapshot = self.snapshot
+        if snapshot.statistics is None:
             return {}
         
-        return {
-            'total_toxic_phrases': len(self.toxic_phrases),
-            'total_entries': len(self.toxic_data),
-            'by_type': self.toxic_data['type'].value_counts().to_dict(),
-            'avg_toxic_score': self.toxic_data['toxic_score'].mean(),
-            'max_toxic_score': self.toxic_data['toxic_score'].max(),
-            'min_toxic_score': self.toxic_data['toxic_score'].min()
-        }
+        # Dictionary-row statistics are computed once when the snapshot is built
+        statistics = {'total_toxic_phrases': len(snapshot.toxic_phrases)}
+        statistics.update(snapshot.statistics)
+        statistics['by_type'] = dict(statistics['by_type'])
+        return statistics
 
 
 def main():
@@ -334,11 +1414,13 @@ def main():
     parser.add_argument('--threshold', type=int, default=3, help='Toxic score threshold')
     parser.add_argument('--details', action='store_true', help='Show detailed information')
     parser.add_argument('--stats', action='store_true', help='Show statistics about toxic phrases')
+    parser.add_argument('--match-mode', choices=ToxicPhraseDetector.MATCH_MODES, default='automaton',
+                        help='Phrase matcher (tokens: word hash lookups, for very large dictionaries)')
     
     args = parser.parse_args()
     
     # Initialize detector
-    detector = ToxicPhraseDetector(args.slang_csv, args.threshold)
+    detector = ToxicPhraseDetector(args.slang_csv, args.threshold, match_mode=args.match_mode)
     
     if args.stats:
         stats = detector.get_statistics()
@@ -365,11 +1447,11 @@ def main():
         
         results = detector.batch_detect(sentences)
         print(f"\n=== Analyzing {len(sentences)} sentences ===\n")
-        for i, (sentence, result) in enumerate(zip(sentences, results), 1):
+        for i, (sentence, result) in enumerate(zip(sentences, results.itertuples(index=False)), 1):
             print(f"{i}. {sentence}")
-            print(f"   Toxic: {result['is_toxic']} | Count: {result['toxic_count']}")
-            if result['toxic_phrases']:
-                print(f"   Phrases: {', '.join(result['toxic_phrases'])}")
+            print(f"   Toxic: {result.is_toxic} | Count: {result.toxic_count}")
+            if result.toxic_phrases:
+                print(f"   Phrases: {', '.join(result.toxic_phrases)}")
             print()
 
 
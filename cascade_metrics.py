@@ -0,0 +1,137 @@
+"""Stage-level metrics for the hybrid classifier cascade.
+
+``HybridToxicClassifier`` runs up to four stages per text: spam filter,
+rule detector, preprocessing and ML scoring (plus the optional result
+cache). ``CascadeMetrics`` counts calls, time and short-circuits per stage,
+and keeps request-latency histograms split by text length. It is read with
+``snapshot()`` or exported in the Prometheus text format with
+``to_prometheus()``.
+
+Metrics are off unless the classifier is given a ``CascadeMetrics``; the
+disabled path only checks ``metrics is None``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Sequence
+
+STAGES = ("spam_filter", "cache", "rule_detector", "preprocessing", "ml_scoring")
+# Upper bounds of the text-length buckets (characters)
+LENGTH_BUCKETS = (32, 64, 128, 256, 512, 1024)
+# Upper bounds of the request-latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _length_label(length_bucket: int) -> str:
+    if length_bucket < len(LENGTH_BUCKETS):
+        return str(LENGTH_BUCKETS[length_bucket])
+    return "+Inf"
+
+
+class CascadeMetrics:
+    """Thread-safe counters and histograms for the classifier stages."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stage_calls: Dict[str, int] = dict.fromkeys(STAGES, 0)
+            self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+            self.stage_short_circuits: Dict[str, int] = dict.fromkeys(STAGES, 0)
+            self.requests = 0
+            # latency_counts[length bucket][latency bucket], last column is +Inf
+            self.latency_counts: List[List[int]] = [
+                [0] * (len(LATENCY_BUCKETS) + 1) for _ in range(len(LENGTH_BUCKETS) + 1)
+            ]
+            self.latency_sums: List[float] = [0.0] * (len(LENGTH_BUCKETS) + 1)
+
+    def record_stage(self, stage: str, seconds: float, calls: int = 1, short_circuits: int = 0):
+        """Add ``calls`` texts processed by ``stage`` in ``seconds``.
+
+        ``short_circuits`` is how many of them the stage answered on its own,
+        so later stages never saw them.
+        """
+        with self._lock:
+            self.stage_calls[stage] += calls
+            self.stage_seconds[stage] += seconds
+            self.stage_short_circuits[stage] += short_circuits
+
+    def record_requests(self, lengths: Sequence[int], seconds_each: float):
+        """Add requests of the given text lengths that took ``seconds_each`` each."""
+        latency_bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds_each)
+        with self._lock:
+            self.requests += len(lengths)
+            for length in lengths:
+                length_bucket = bisect.bisect_left(LENGTH_BUCKETS, length)
+                self.latency_counts[length_bucket][latency_bucket] += 1
+                self.latency_sums[length_bucket] += seconds_each
+
+    def snapshot(self) -> Dict:
+        """Point-in-time copy of every metric as plain Python data."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "calls": self.stage_calls[stage],
+                    "seconds": self.stage_seconds[stage],
+                    "mean_us": self.stage_seconds[stage] / self.stage_calls[stage] * 1e6
+                    if self.stage_calls[stage]
+                    else 0.0,
+                    "short_circuits": self.stage_short_circuits[stage],
+                }
+                for stage in STAGES
+            }
+            latency = {
+                _length_label(length_bucket): {
+                    "count": sum(counts),
+                    "sum_seconds": self.latency_sums[length_bucket],
+                    "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], counts)),
+                }
+                for length_bucket, counts in enumerate(self.latency_counts)
+            }
+            return {"requests": self.requests, "stages": stages, "latency_by_length": latency}
+
+    def to_prometheus(self, prefix: str = "toxicity") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_requests_total Texts classified.",
+            f"# TYPE {prefix}_requests_total counter",
+            f"{prefix}_requests_total {snap['requests']}",
+        ]
+        for name, key, help_text in (
+            ("stage_calls_total", "calls", "Texts that reached each cascade stage."),
+            ("stage_seconds_total", "seconds", "Time spent in each cascade stage."),
+            ("stage_short_circuits_total", "short_circuits", "Texts each stage answered without later stages."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for stage, values in snap["stages"].items():
+                lines.append(f'{prefix}_{name}{{stage="{stage}"}} {values[key]}')
+
+        metric = f"{prefix}_request_latency_seconds"
+        lines.append(f"# HELP {metric} Request latency by text length (characters, upper bound).")
+        lines.append(f"# TYPE {metric} histogram")
+        for length, values in snap["latency_by_length"].items():
+            cumulative = 0
+            for bound, count in values["buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{length_le="{length}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{length_le="{length}"}} {values["sum_seconds"]}')
+            lines.append(f'{metric}_count{{length_le="{length}"}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """Human-readable per-stage summary."""
+        snap = self.snapshot()
+        lines = [f"{'Stage':<15}{'Calls':>10}{'Total ms':>12}{'Mean us':>10}{'Short-circuits':>16}"]
+        for stage, values in snap["stages"].items():
+            lines.append(
+                f"{stage:<15}{values['calls']:>10}{values['seconds'] * 1000:>12.1f}"
+                f"{values['mean_us']:>10.1f}{values['short_circuits']:>16}"
+            )
+        lines.append(f"Requests: {snap['requests']}")
+        return "\n".join(lines)
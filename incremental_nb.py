@@ -0,0 +1,326 @@
+"""Incremental (online) training of the Naive Bayes model.
+
+The tuned model (``naive_bayes_tuned_balanced.pkl``) is rebuilt offline: refit
+TF-IDF, SMOTE, grid search, re-pickle. Here the vectorizer is a
+``HashingVectorizer``, which is stateless (a term's feature id is its hash),
+so there is no vocabulary to refit, and ``MultinomialNB.partial_fit`` folds
+newly labelled comments into the class/feature counts. Training on batches
+one after another gives the same model as one ``fit`` over all of them.
+
+Texts go through the same ``clean_text`` + ``preprocess_text`` as serving.
+Labels follow the dataset convention: class 0 is safe, anything else is a
+violation.
+
+Each run writes a snapshot (the model counts plus a version number) to a
+temporary file and renames it over the previous one, so readers only ever
+see complete snapshots. ``SnapshotWatcher`` polls the snapshot and swaps new
+models into a running ``HybridToxicClassifier``; the hashing vectorizer is
+the same for every snapshot, so the swap is a single attribute assignment.
+
+Usage examples:
+    python incremental_nb.py labeled_clean.csv --reset
+    python incremental_nb.py moderator_labels.csv --batch-size 500
+    python incremental_nb.py new.jsonl --text-column text --label-column label
+    python moderation_service.py --incremental-model
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+INCREMENTAL_MODEL_PATH = PROJECT_ROOT / "saved_models" / "naive_bayes_incremental.pkl"
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_N_FEATURES = 2**20
+# Same smoothing and n-grams as the tuned TF-IDF model
+DEFAULT_ALPHA = 0.1
+NGRAM_RANGE = (1, 2)
+CLASSES = (0, 1)
+
+
+def make_vectorizer(n_features: int = DEFAULT_N_FEATURES):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # alternate_sign=False keeps the counts non-negative, as MultinomialNB needs
+    return HashingVectorizer(n_features=n_features, ngram_range=NGRAM_RANGE, alternate_sign=False, norm="l2")
+
+
+def violation_label(value) -> int:
+    """Binary label from a dataset class value (0 = safe, anything else = violation)."""
+    return int(int(float(value)) != 0)
+
+
+class IncrementalNBModel:
+    """Hashing vectorizer + MultinomialNB trained with partial_fit.
+
+    Args:
+        n_features: Hash space size; snapshots with different sizes are not
+            interchangeable
+        alpha: Additive smoothing of the Naive Bayes model
+        model: Already trained MultinomialNB (from a snapshot)
+        version: Number of training runs folded into the model
+        examples_seen: Number of labelled texts folded into the model
+    """
+
+    def __init__(
+        self,
+        n_features: int = DEFAULT_N_FEATURES,
+        alpha: float = DEFAULT_ALPHA,
+        model=None,
+        version: int = 0,
+        examples_seen: int = 0,
+        updated_at: float | None = None,
+    ):
+        from sklearn.naive_bayes import MultinomialNB
+
+        self.n_features = n_features
+        self.alpha = alpha
+        self.vectorizer = make_vectorizer(n_features)
+        self.model = model if model is not None else MultinomialNB(alpha=alpha)
+        self.version = version
+        self.examples_seen = examples_seen
+        self.updated_at = updated_at
+
+    def partial_fit(self, processed_texts: Sequence[str], labels: Sequence[int]) -> IncrementalNBModel:
+        """Fold one mini-batch of preprocessed texts and 0/1 labels into the model."""
+        if len(processed_texts) != len(labels):
+            raise ValueError("processed_texts and labels must have the same length")
+        if not processed_texts:
+            return self
+        self.model.partial_fit(self.vectorizer.transform(processed_texts), list(labels), classes=list(CLASSES))
+        self.examples_seen += len(processed_texts)
+        return self
+
+    def predict_proba(self, processed_texts: Sequence[str]):
+        """Violation probability for each preprocessed text."""
+        return self.model.predict_proba(self.vectorizer.transform(processed_texts))[:, 1]
+
+    @property
+    def is_fitted(self) -> bool:
+        return hasattr(self.model, "classes_")
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "examples_seen": self.examples_seen,
+            "updated_at": self.updated_at,
+            "n_features": self.n_features,
+        }
+
+    def save(self, path=INCREMENTAL_MODEL_PATH) -> Path:
+        """Write a snapshot atomically (temporary file + rename) and bump the version."""
+        if not self.is_fitted:
+            raise ValueError("Cannot snapshot a model that has not seen any examples")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "n_features": self.n_features,
+            "alpha": self.alpha,
+            "model": self.model,
+            "version": self.version + 1,
+            "examples_seen": self.examples_seen,
+            "updated_at": time.time(),
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self.version = payload["version"]
+        self.updated_at = payload["updated_at"]
+        return path
+
+    @classmethod
+    def load(cls, path=INCREMENTAL_MODEL_PATH) -> IncrementalNBModel:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+        if payload.get("format") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported incremental model snapshot format in {path}")
+        return cls(
+            n_features=payload["n_features"],
+            alpha=payload["alpha"],
+            model=payload["model"],
+            version=payload["version"],
+            examples_seen=payload["examples_seen"],
+            updated_at=payload["updated_at"],
+        )
+
+
+def _stat_signature(path: Path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class SnapshotWatcher:
+    """Keep a HybridToxicClassifier on the newest incremental model snapshot.
+
+    ``check()`` loads the snapshot when the file changed. The first load
+    replaces the classifier's vectorizer and model (and drops its TF-IDF
+    scoring table), so call it before serving; later loads only swap
+    ``classifier.ml_model``, which also invalidates its result cache.
+    """
+
+    def __init__(self, classifier, path=INCREMENTAL_MODEL_PATH, interval: float = 10.0, verbose: bool = True):
+        self.classifier = classifier
+        self.path = Path(path)
+        self.interval = interval
+        self.verbose = verbose
+        self.current: IncrementalNBModel | None = None
+        self._signature = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def check(self) -> bool:
+        """Load the snapshot if it changed; True if a new model was swapped in."""
+        signature = _stat_signature(self.path)
+        if signature is None or signature == self._signature:
+            return False
+        snapshot = IncrementalNBModel.load(self.path)
+        self._signature = signature
+        if self.current is None:
+            self.classifier.scoring_table = None
+            self.classifier.vectorizer = snapshot.vectorizer
+        elif snapshot.n_features != self.current.n_features:
+            raise ValueError(
+                f"Snapshot hash size changed ({self.current.n_features} -> {snapshot.n_features}); restart to load it"
+            )
+        self.classifier.ml_model = snapshot.model
+        self.current = snapshot
+        return True
+
+    def info(self) -> Dict | None:
+        return {"path": str(self.path), **self.current.info()} if self.current is not None else None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="nb-snapshot-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.check() and self.verbose:
+                    print(f"Loaded incremental model v{self.current.version} ({self.current.examples_seen} examples)")
+            except Exception as exc:
+                # Keep serving the previous model
+                print(f"Incremental model reload failed, keeping previous version: {exc}")
+
+
+def iter_labelled(path: Path, text_column: str, label_column: str) -> Iterator[Tuple[str, int]]:
+    """(text, 0/1 label) rows of a CSV or JSONL file; rows without text or label are skipped."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            records: Iterable[Dict] = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for record in records:
+            text, label = record.get(text_column), record.get(label_column)
+            if text in (None, "") or label in (None, ""):
+                continue
+            yield str(text), violation_label(label)
+
+
+def _batches(rows: Iterable[Tuple[str, int]], size: int) -> Iterator[List[Tuple[str, int]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def train_incremental(
+    inputs: Sequence[Path],
+    snapshot_path: Path = INCREMENTAL_MODEL_PATH,
+    text_column: str = "tweet",
+    label_column: str = "class",
+    batch_size: int = 1000,
+    reset: bool = False,
+    n_features: int = DEFAULT_N_FEATURES,
+    alpha: float = DEFAULT_ALPHA,
+) -> IncrementalNBModel:
+    """Fold labelled files into the current snapshot (or a new model) and write a new snapshot."""
+    import run_batch_toxicity_tests as runner
+
+    runner.ensure_nltk_resources()
+    if snapshot_path.exists() and not reset:
+        model = IncrementalNBModel.load(snapshot_path)
+        print(f"Continuing from snapshot v{model.version} ({model.examples_seen} examples)")
+    else:
+        model = IncrementalNBModel(n_features=n_features, alpha=alpha)
+
+    started = time.perf_counter()
+    added = 0
+    for path in inputs:
+        for batch in _batches(iter_labelled(Path(path), text_column, label_column), batch_size):
+            texts, labels = zip(*batch)
+            processed = [runner.preprocess_text(cleaned) for cleaned in runner.clean_texts(list(texts))]
+            model.partial_fit(processed, labels)
+            added += len(batch)
+    if not added:
+        print("No labelled rows found; snapshot left unchanged")
+        return model
+
+    model.save(snapshot_path)
+    print(
+        f"✓ Folded {added} examples in {time.perf_counter() - started:.1f}s; "
+        f"snapshot v{model.version} ({model.examples_seen} examples) written to {snapshot_path}"
+    )
+    return model
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fold newly labelled comments into the incremental NB model")
+    parser.add_argument("inputs", nargs="+", help="Labelled CSV or JSONL files")
+    parser.add_argument("--snapshot", default=str(INCREMENTAL_MODEL_PATH), help="Model snapshot to update")
+    parser.add_argument("--text-column", default="tweet", help="Text column/field (default: tweet)")
+    parser.add_argument("--label-column", default="class", help="Label column/field, 0 = safe (default: class)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Texts per partial_fit call (default: 1000)")
+    parser.add_argument("--reset", action="store_true", help="Start a new model instead of updating the snapshot")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Hash space size for --reset")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="NB smoothing for --reset")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    train_incremental(
+        [Path(path) for path in args.inputs],
+        snapshot_path=Path(args.snapshot),
+        text_column=args.text_column,
+        label_column=args.label_column,
+        batch_size=args.batch_size,
+        reset=args.reset,
+        n_features=args.n_features,
+        alpha=args.alpha,
+    )
+
+
+if __name__ == "__main__":
+    main()
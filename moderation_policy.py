@@ -0,0 +1,128 @@
+"""Per-tenant moderation policies over one shared classifier.
+
+The expensive parts of the cascade (dictionary, automaton, ML model) do not
+depend on how strict a community wants to be; only the final decisions do:
+
+* ``toxic_threshold``: minimum dictionary toxic_score for a phrase to count
+  as toxic in the rule stage
+* ``warning_threshold`` / ``violation_threshold``: ML probability tiers
+
+A ``ModerationPolicy`` holds just those numbers, so serving another tenant
+costs one small object instead of another loaded dictionary and model. The
+rule detector has to be loaded with the lowest ``toxic_threshold`` any policy
+uses (see ``min_toxic_threshold``).
+
+Policies files are JSON objects keyed by tenant name:
+
+    {"kids": {"toxic_threshold": 2, "warning_threshold": 0.4, "violation_threshold": 0.6},
+     "gaming": {"warning_threshold": 0.75, "violation_threshold": 0.9}}
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+DEFAULT_TOXIC_THRESHOLD = 3
+POLICY_FIELDS = ("toxic_threshold", "warning_threshold", "violation_threshold")
+
+
+class ModerationPolicy:
+    """Thresholds and tiers applied to raw rule matches and ML probabilities.
+
+    Args:
+        warning_threshold: Lowest probability labeled WARNING
+        violation_threshold: Probabilities above it are labeled VIOLATION
+        toxic_threshold: Minimum dictionary toxic_score for rule matches
+        name: Tenant name, for logs and results
+    """
+
+    __slots__ = ("name", "warning_threshold", "violation_threshold", "toxic_threshold")
+
+    def __init__(
+        self,
+        warning_threshold: float = 0.6,
+        violation_threshold: float = 0.8,
+        toxic_threshold: float = DEFAULT_TOXIC_THRESHOLD,
+        name: str = "default",
+    ):
+        if warning_threshold >= violation_threshold:
+            raise ValueError("warning_threshold must be lower than violation_threshold")
+        self.name = name
+        self.warning_threshold = warning_threshold
+        self.violation_threshold = violation_threshold
+        self.toxic_threshold = toxic_threshold
+
+    @classmethod
+    def from_dict(cls, config: Dict, name: str = "default", base: ModerationPolicy | None = None) -> ModerationPolicy:
+        """Policy from a config dict; missing fields come from ``base`` (or the defaults)."""
+        unknown = set(config) - set(POLICY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown policy fields for {name!r}: {', '.join(sorted(unknown))}")
+        base = base or cls()
+        values = {field: config.get(field, getattr(base, field)) for field in POLICY_FIELDS}
+        return cls(name=name, **values)
+
+    @property
+    def key(self) -> Tuple:
+        """Everything a classification result depends on (for result caches)."""
+        return (self.toxic_threshold, self.warning_threshold, self.violation_threshold)
+
+    def label(self, probability: float) -> Tuple[str, bool]:
+        """(tier label, is_violation) for an ML probability."""
+        if probability > self.violation_threshold:
+            return "VIOLATION", True
+        if probability >= self.warning_threshold:
+            return "WARNING", False
+        return "SAFE", False
+
+    def describe_tiers(self) -> str:
+        return (
+            f"SAFE < {self.warning_threshold:.2f}, "
+            f"WARNING [{self.warning_threshold:.2f}, {self.violation_threshold:.2f}], "
+            f"VIOLATION > {self.violation_threshold:.2f}"
+        )
+
+    def __repr__(self):
+        return (
+            f"ModerationPolicy(name={self.name!r}, toxic_threshold={self.toxic_threshold}, "
+            f"warning_threshold={self.warning_threshold}, violation_threshold={self.violation_threshold})"
+        )
+
+
+def read_policy_config(path) -> Dict[str, Dict]:
+    """Raw tenant -> fields mapping of a policies JSON file (fields are checked, not filled in)."""
+    with open(Path(path), encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected an object keyed by tenant name")
+    for name, values in config.items():
+        if not isinstance(values, dict):
+            raise ValueError(f"{path}: policy {name!r} must be an object")
+        unknown = set(values) - set(POLICY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown policy fields for {name!r}: {', '.join(sorted(unknown))}")
+    return config
+
+
+def build_policies(config: Dict[str, Dict], base: ModerationPolicy | None = None) -> Dict[str, ModerationPolicy]:
+    """Policies from a raw config; fields a tenant leaves out come from ``base``."""
+    return {name: ModerationPolicy.from_dict(values, name=name, base=base) for name, values in config.items()}
+
+
+def load_policies(path, base: ModerationPolicy | None = None) -> Dict[str, ModerationPolicy]:
+    """Read a policies JSON file; fields a tenant leaves out come from ``base``."""
+    return build_policies(read_policy_config(path), base=base)
+
+
+def min_toxic_threshold(configs: Iterable[Dict]) -> float:
+    """Threshold the shared rule detector must be loaded with to serve every policy.
+
+    Takes raw policy configs (see ``read_policy_config``), so it can run before
+    the classifier whose policy fills in the other fields exists; the default
+    policy is always included.
+    """
+    return min(
+        [DEFAULT_TOXIC_THRESHOLD, *(config.get("toxic_threshold", DEFAULT_TOXIC_THRESHOLD) for config in configs)]
+    )
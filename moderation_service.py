@@ -0,0 +1,425 @@
+"""HTTP moderation service for the Hybrid Toxic Content Classifier.
+
+Concurrent requests are collected into micro-batches (bounded by size and by
+wait time) and scored with ``HybridToxicClassifier.predict_batch`` in a worker
+thread, so the event loop keeps accepting requests while a batch runs. The
+request queue is bounded: when it is full, requests are rejected with 503
+instead of piling up.
+
+Endpoints:
+    POST /predict   {"text": "..."} or {"texts": ["...", ...]}, optionally
+                    with "tenant" to apply that tenant's policy (--policies)
+    GET  /stats     latency percentiles, batch sizes, queue depth (and the
+                    incremental model snapshot, with --incremental-model)
+    GET  /metrics   cascade stage metrics, Prometheus text format (--metrics)
+    GET  /health
+
+Usage:
+    python moderation_service.py --port 8000
+    python moderation_service.py --port 8000 --policies policies.json
+    python moderation_service.py --port 8000 --incremental-model
+    curl -s localhost:8000/predict -d '{"text": "you are an idiot"}'
+    curl -s localhost:8000/predict -d '{"text": "you are an idiot", "tenant": "kids"}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+MAX_BODY_BYTES = 1 << 20
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Overloaded(Exception):
+    """Raised when the request queue has no room left."""
+
+
+class SampleWindow:
+    """Sliding window of recent samples (latencies, batch sizes) with percentiles."""
+
+    def __init__(self, window: int = 10000):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+
+    def percentiles(
+        self, points: Sequence[float] = (50, 90, 99), scale: float = 1.0, suffix: str = ""
+    ) -> Dict[str, float]:
+        """Nearest-rank percentiles over the window, multiplied by ``scale``."""
+        stats: Dict[str, float] = {"count": self.count}
+        if not self.samples:
+            return stats
+        ordered = sorted(self.samples)
+        for point in points:
+            rank = max(1, math.ceil(point / 100 * len(ordered)))
+            stats[f"p{point:g}{suffix}"] = round(ordered[rank - 1] * scale, 3)
+        stats[f"max{suffix}"] = round(ordered[-1] * scale, 3)
+        return stats
+
+
+class MicroBatcher:
+    """Collects single-text requests into batches for a batch predict function.
+
+    Requests may carry a policy; batches with any policy set are scored with
+    ``predict_batch(texts, policies)``, one entry per text (None: default).
+
+    Args:
+        predict_batch: Function mapping a list of texts to a list of results
+        max_batch_size: Largest batch handed to predict_batch
+        max_wait_ms: Longest time the first request of a batch waits for more
+        max_queue: Requests allowed to wait; submit raises Overloaded beyond it
+        executor: Executor predict_batch runs in (default: one worker thread)
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List[Dict]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 1024,
+        executor=None,
+    ):
+        if max_batch_size < 1 or max_queue < 1:
+            raise ValueError("max_batch_size and max_queue must be positive")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self.queue: asyncio.Queue | None = None
+        self.request_latency = SampleWindow()
+        self.batch_latency = SampleWindow()
+        self.batch_sizes = SampleWindow()
+        self.rejected = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def free_slots(self) -> int:
+        return self.max_queue - self.queue.qsize()
+
+    def submit_many(self, texts: Sequence[str], policy=None) -> List[asyncio.Future]:
+        """Queue texts and return one future per text, all or nothing.
+
+        Raises:
+            Overloaded: If the queue cannot take every text
+        """
+        if len(texts) > self.free_slots():
+            self.rejected += len(texts)
+            raise Overloaded(f"request queue is full ({self.max_queue} pending)")
+        loop = asyncio.get_running_loop()
+        futures = []
+        now = time.perf_counter()
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text, policy, future, now))
+            futures.append(future)
+        return futures
+
+    async def predict(self, text: str, policy=None) -> Dict:
+        (future,) = self.submit_many([text], policy)
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, object, asyncio.Future, float]]:
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before waiting for more
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - time.perf_counter()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests whose client went away do not need scoring
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+            texts = [text for text, _, _, _ in batch]
+            policies = [policy for _, policy, _, _ in batch]
+            args = (texts, policies) if any(policy is not None for policy in policies) else (texts,)
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.predict_batch, *args)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"Batch prediction failed: {exc}")
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+            self.batch_latency.record(finished - started)
+            self.batch_sizes.record(len(batch))
+            for (_, _, future, queued_at), result in zip(batch, results):
+                self.request_latency.record(finished - queued_at)
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "request_latency": self.request_latency.percentiles(scale=1000, suffix="_ms"),
+            "batch_latency": self.batch_latency.percentiles(scale=1000, suffix="_ms"),
+            "batch_size": self.batch_sizes.percentiles(),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+class ModerationServer:
+    """Minimal HTTP/1.1 server (keep-alive, JSON bodies) in front of a MicroBatcher."""
+
+    def __init__(
+        self,
+        batcher: MicroBatcher,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        metrics=None,
+        policies=None,
+        model_watcher=None,
+    ):
+        self.batcher = batcher
+        # Optional CascadeMetrics served on /metrics
+        self.metrics = metrics
+        # Tenant name -> ModerationPolicy, selected with "tenant" in /predict
+        self.policies = policies or {}
+        # Optional incremental_nb.SnapshotWatcher, reported on /stats
+        self.model_watcher = model_watcher
+        self.host = host
+        self.port = port
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        await self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Report the actual port when 0 was requested
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"✓ Moderation service listening on http://{self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if isinstance(body, int):
+                    status, payload = body, {"error": HTTP_REASONS[body]}
+                else:
+                    status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return "", "", {"connection": "close"}, 400
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return method, path, {"connection": "close"}, 400
+        if length > MAX_BODY_BYTES:
+            return method, path, {"connection": "close"}, 413
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            stats = {**self.batcher.stats(), "tenants": sorted(self.policies)}
+            if self.model_watcher is not None:
+                stats["model"] = self.model_watcher.info()
+            return 200, stats
+        if path == "/metrics":
+            if self.metrics is None:
+                return 404, {"error": "metrics are disabled (start with --metrics)"}
+            return 200, self.metrics.to_prometheus()
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(payload, dict):
+            payload = {}
+        single = "text" in payload
+        texts = [payload["text"]] if single else payload.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return 400, {"error": 'expected {"text": str} or {"texts": [str, ...]}'}
+        policy = None
+        tenant = payload.get("tenant")
+        if tenant is not None:
+            policy = self.policies.get(tenant)
+            if policy is None:
+                return 400, {"error": f"unknown tenant {tenant!r}"}
+
+        try:
+            futures = self.batcher.submit_many(texts, policy)
+        except Overloaded as exc:
+            return 503, {"error": str(exc)}
+        try:
+            results = await asyncio.gather(*futures)
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+        return 200, results[0] if single else results
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP moderation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Largest micro-batch (default: 64)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Longest wait to fill a batch (default: 5)")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Pending requests before 503 (default: 1024)")
+    parser.add_argument("--cache-size", type=int, default=0, help="Entries in the result cache (default: 0, disabled)")
+    parser.add_argument("--fast-start", action="store_true", help="Minimal startup (see run_batch_toxicity_tests.py)")
+    parser.add_argument("--metrics", action="store_true", help="Collect cascade stage metrics and serve /metrics")
+    parser.add_argument("--policies", help="JSON file of per-tenant policies (see moderation_policy.py)")
+    parser.add_argument(
+        "--incremental-model",
+        nargs="?",
+        const="",
+        help="Serve the incremental NB snapshot (default path if no value) and reload it when it changes",
+    )
+    parser.add_argument(
+        "--model-reload-interval", type=float, default=10.0, help="Seconds between snapshot checks (default: 10)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import run_batch_toxicity_tests as runner
+    from moderation_policy import build_policies, min_toxic_threshold, read_policy_config
+
+    args = parse_args(argv)
+    policy_config = read_policy_config(args.policies) if args.policies else {}
+    runner.ensure_nltk_resources()
+    # One classifier serves every tenant: the dictionary is loaded at the
+    # lowest toxic_threshold any policy uses
+    classifier, _ = runner.load_hybrid_classifier(
+        verbose=not args.fast_start,
+        cache_size=args.cache_size,
+        prewarm_lemmas=not args.fast_start,
+        rule_threshold=min_toxic_threshold(policy_config.values()),
+    )
+    # Thresholds a tenant leaves out come from the model's own policy
+    policies = build_policies(policy_config, base=classifier.policy)
+    if args.metrics:
+        classifier.metrics = runner.CascadeMetrics()
+    model_watcher = None
+    if args.incremental_model is not None:
+        from incremental_nb import INCREMENTAL_MODEL_PATH, SnapshotWatcher
+
+        model_watcher = SnapshotWatcher(
+            classifier, args.incremental_model or INCREMENTAL_MODEL_PATH, interval=args.model_reload_interval
+        )
+        if not model_watcher.check():
+            raise SystemExit(f"No incremental model snapshot at {model_watcher.path} (run incremental_nb.py first)")
+        model_watcher.start()
+    batcher = MicroBatcher(
+        classifier.predict_batch,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=args.max_queue,
+    )
+    server = ModerationServer(
+        batcher, args.host, args.port, metrics=classifier.metrics, policies=policies, model_watcher=model_watcher
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if model_watcher is not None:
+            model_watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
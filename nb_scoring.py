@@ -0,0 +1,305 @@
+"""Direct linear scoring of the TF-IDF + Naive Bayes model.
+
+For a binary MultinomialNB/ComplementNB on TF-IDF features, the violation
+log-odds is a linear function of the normalized TF-IDF vector:
+
+    logit = sum_j tf_j * idf_j * (log P(j|1) - log P(j|0)) / ||tf * idf|| + b
+
+so the vectorizer and the model fold into one scoring table holding, for
+every vocabulary term, its IDF and IDF x log-ratio weight. ``NBScoringTable``
+evaluates that formula with NumPy, with the same tokenization, sublinear TF
+and normalization as sklearn, and matches ``predict_proba`` to floating
+point rounding.
+
+Export the table next to the sklearn artifacts with:
+
+    python nb_scoring.py --model-dir saved_models
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+SCORING_TABLE_NAME = "nb_scoring_table.npz"
+SCORING_TABLE_VERSION = 1
+
+# Vectorizer output that clean_text + preprocess_text can produce
+_SIMPLE_TEXT_RE = re.compile(r"[a-z ]*")
+
+
+class NBScoringTable:
+    """Vocabulary, IDF and per-term log-odds weights of a TF-IDF + NB model.
+
+    Args:
+        terms: Vocabulary terms (unigrams or space-joined n-grams), by feature id
+        idf: IDF weight per feature (ones when the vectorizer has no IDF)
+        weights: IDF x (log P(term|positive) - log P(term|negative)) per feature
+        intercept: Log-odds of the positive class for an empty vector
+        ngram_range: Vectorizer n-gram range
+        token_pattern: Vectorizer token regex
+        lowercase: Whether the vectorizer lowercases its input
+        sublinear_tf: Whether TF is replaced by 1 + log(TF)
+        binary: Whether TF is clipped to 1
+        norm: 'l2', 'l1' or None
+    """
+
+    def __init__(
+        self,
+        terms: Sequence[str],
+        idf: np.ndarray,
+        weights: np.ndarray,
+        intercept: float,
+        ngram_range=(1, 1),
+        token_pattern: str = r"(?u)\b\w\w+\b",
+        lowercase: bool = True,
+        sublinear_tf: bool = False,
+        binary: bool = False,
+        norm: str | None = "l2",
+    ):
+        if norm not in ("l2", "l1", None):
+            raise ValueError(f"Unsupported norm: {norm!r}")
+        self.terms = list(terms)
+        self.vocabulary: Dict[str, int] = {term: idx for idx, term in enumerate(self.terms)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.token_pattern = token_pattern
+        self.lowercase = bool(lowercase)
+        self.sublinear_tf = bool(sublinear_tf)
+        self.binary = bool(binary)
+        self.norm = norm
+        self._token_re = re.compile(token_pattern)
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model, positive_class=1) -> "NBScoringTable":
+        """Fold a fitted TfidfVectorizer and binary MultinomialNB/ComplementNB.
+
+        Raises:
+            ValueError: If the vectorizer or model cannot be expressed as a
+                scoring table (custom analyzers, stop words, other NB variants)
+        """
+        if getattr(vectorizer, "analyzer", None) != "word":
+            raise ValueError("Only word analyzers can be exported")
+        for attr in ("tokenizer", "preprocessor", "stop_words", "strip_accents"):
+            if getattr(vectorizer, attr, None) is not None:
+                raise ValueError(f"Vectorizers with a custom {attr} cannot be exported")
+
+        model_name = type(model).__name__
+        if model_name not in ("MultinomialNB", "ComplementNB"):
+            raise ValueError(f"Unsupported model for linear scoring: {model_name}")
+        classes = list(model.classes_)
+        if len(classes) != 2 or positive_class not in classes:
+            raise ValueError("Linear scoring needs a binary model containing the positive class")
+        pos = classes.index(positive_class)
+        neg = 1 - pos
+
+        # Both models score jll = X @ feature_log_prob_.T (+ class_log_prior_,
+        # which ComplementNB only adds for single-class models)
+        feature_log_prob = np.asarray(model.feature_log_prob_, dtype=np.float64)
+        log_ratio = feature_log_prob[pos] - feature_log_prob[neg]
+        intercept = 0.0
+        if model_name == "MultinomialNB":
+            intercept = float(model.class_log_prior_[pos] - model.class_log_prior_[neg])
+
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, idx in vectorizer.vocabulary_.items():
+            terms[idx] = term
+        if getattr(vectorizer, "use_idf", False):
+            idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        else:
+            idf = np.ones(len(terms), dtype=np.float64)
+
+        return cls(
+            terms,
+            idf,
+            idf * log_ratio,
+            intercept,
+            ngram_range=vectorizer.ngram_range,
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+            norm=vectorizer.norm,
+        )
+
+    def save(self, path):
+        """Write the table as a NumPy archive (no pickled objects)."""
+        np.savez_compressed(
+            path,
+            version=np.array(SCORING_TABLE_VERSION),
+            terms=np.array(self.terms, dtype=str),
+            idf=self.idf,
+            weights=self.weights,
+            intercept=np.array(self.intercept),
+            ngram_range=np.array(self.ngram_range),
+            token_pattern=np.array(self.token_pattern),
+            flags=np.array([self.lowercase, self.sublinear_tf, self.binary]),
+            norm=np.array(self.norm or ""),
+        )
+
+    @classmethod
+    def load(cls, path) -> "NBScoringTable":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != SCORING_TABLE_VERSION:
+                raise ValueError(f"Unsupported scoring table version in {path}")
+            lowercase, sublinear_tf, binary = (bool(flag) for flag in data["flags"])
+            return cls(
+                data["terms"].tolist(),
+                data["idf"],
+                data["weights"],
+                float(data["intercept"]),
+                ngram_range=tuple(data["ngram_range"].tolist()),
+                token_pattern=str(data["token_pattern"]),
+                lowercase=lowercase,
+                sublinear_tf=sublinear_tf,
+                binary=binary,
+                norm=str(data["norm"]) or None,
+            )
+
+    def tokenize(self, text: str) -> List[str]:
+        """Same tokens as the vectorizer's word analyzer (before n-grams)."""
+        if self.lowercase:
+            text = text.lower()
+        if _SIMPLE_TEXT_RE.fullmatch(text) and self.token_pattern == r"(?u)\b\w\w+\b":
+            return [token for token in text.split() if len(token) > 1]
+        return self._token_re.findall(text)
+
+    def token_ids(self, text: str) -> List[int]:
+        """Feature ids of every in-vocabulary n-gram of ``text``, with repeats."""
+        tokens = self.tokenize(text)
+        vocabulary = self.vocabulary
+        min_n, max_n = self.ngram_range
+        ids = []
+        for n in range(min_n, max_n + 1):
+            if n == 1:
+                grams = tokens
+            else:
+                grams = (" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+            for gram in grams:
+                idx = vocabulary.get(gram)
+                if idx is not None:
+                    ids.append(idx)
+        return ids
+
+    def _scores(self, docs: np.ndarray, features: np.ndarray, counts: np.ndarray, n_docs: int) -> np.ndarray:
+        # docs/features/counts are the non-zero entries of the count matrix,
+        # sorted by (doc, feature); single texts and batches share this path so
+        # they give bit-identical scores.
+        scores = np.full(n_docs, self.intercept, dtype=np.float64)
+        tf = counts.astype(np.float64)
+        if self.binary:
+            tf = np.ones_like(tf)
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+
+        dot = np.bincount(docs, weights=tf * self.weights[features], minlength=n_docs)
+        if self.norm is None:
+            return scores + dot
+
+        values = tf * self.idf[features]
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(docs, weights=values * values, minlength=n_docs))
+        else:
+            norms = np.bincount(docs, weights=np.abs(values), minlength=n_docs)
+        nonzero = norms > 0
+        scores[nonzero] += dot[nonzero] / norms[nonzero]
+        return scores
+
+    def score(self, text: str) -> float:
+        """Positive-class log-odds of a single text."""
+        counts = sorted(Counter(self.token_ids(text)).items())
+        if not counts:
+            return self.intercept
+        features, tf = zip(*counts)
+        docs = np.zeros(len(counts), dtype=np.int64)
+        return float(self._scores(docs, np.array(features), np.array(tf), 1)[0])
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        """Positive-class log-odds for each text."""
+        n_docs = len(texts)
+        if n_docs == 1:
+            return np.array([self.score(texts[0])])
+        doc_ids = []
+        feature_ids = []
+        for doc, text in enumerate(texts):
+            ids = self.token_ids(text)
+            feature_ids.extend(ids)
+            doc_ids.extend([doc] * len(ids))
+        if not feature_ids:
+            return np.full(n_docs, self.intercept, dtype=np.float64)
+
+        # Count each (doc, feature) pair: this is the CountVectorizer matrix
+        n_features = len(self.terms)
+        keys = np.asarray(doc_ids, dtype=np.int64) * n_features + np.asarray(feature_ids, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        return self._scores(keys // n_features, keys % n_features, counts, n_docs)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Positive-class probability for each text (``predict_proba(X)[:, 1]``)."""
+        scores = self.decision_function(texts)
+        return np.exp(-np.logaddexp(0.0, -scores))
+
+
+def load_scoring_table(model_dir: Path, vectorizer=None, model=None, sources: Sequence[Path] = ()) -> NBScoringTable | None:
+    """Exported table from ``model_dir`` if present, else folded from the sklearn objects.
+
+    An exported table older than any of ``sources`` (the artifacts it was
+    exported from) is ignored. Returns None when neither is possible, so
+    callers keep using sklearn.
+    """
+    path = Path(model_dir) / SCORING_TABLE_NAME
+    if _is_fresh(path, sources):
+        try:
+            return NBScoringTable.load(path)
+        except (OSError, KeyError, ValueError) as exc:
+            print(f"Ignoring unreadable scoring table {path}: {exc}")
+    if vectorizer is None or model is None:
+        return None
+    try:
+        return NBScoringTable.from_sklearn(vectorizer, model)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _is_fresh(path: Path, sources: Sequence[Path]) -> bool:
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return False
+    for source in sources:
+        try:
+            if Path(source).stat().st_mtime_ns > mtime:
+                return False
+        except OSError:
+            continue
+    return True
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the TF-IDF + Naive Bayes scoring table.")
+    parser.add_argument("--model-dir", default=str(Path(__file__).resolve().parent / "saved_models"))
+    parser.add_argument("--model", default="naive_bayes_tuned_balanced.pkl", help="Model file inside --model-dir.")
+    parser.add_argument("--vectorizer", default="tfidf_vectorizer.pkl", help="Vectorizer file inside --model-dir.")
+    parser.add_argument("--output", help=f"Output path (default: <model-dir>/{SCORING_TABLE_NAME}).")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    model = joblib.load(model_dir / args.model)
+    vectorizer = joblib.load(model_dir / args.vectorizer)
+    table = NBScoringTable.from_sklearn(vectorizer, model)
+    output = Path(args.output) if args.output else model_dir / SCORING_TABLE_NAME
+    table.save(output)
+    print(f"✓ Scoring table with {len(table.terms)} terms saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
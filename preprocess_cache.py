@@ -0,0 +1,231 @@
+"""Persistent, content-addressed cache of preprocessed training text.
+
+Training runs and notebooks preprocess the whole corpus on every run
+(``preprocess_text(clean_text(x))``: NLTK tokenization and lemmatization),
+although the corpus and the preprocessing rarely change between runs.
+``PreprocessCache`` stores the output per row, keyed by a hash of the raw
+text and of the preprocessing code, so a run only pays for rows it has not
+seen with the current preprocessing:
+
+    cache = PreprocessCache(".prepcache", preprocess_row, workers=8)
+    df["processed"] = cache.map(df["comment_text"])
+
+Storage is columnar: each fill appends one segment, an uncompressed ``.npz``
+with a ``keys`` column (16-byte BLAKE2b digests), and the processed text as
+one UTF-8 ``data`` column plus row ``offsets``. Segments are written to a
+temporary file and renamed into place, so an interrupted run never leaves a
+half-written segment behind; small segments are merged once there are more
+than ``max_segments``.
+
+The version in every key is a fingerprint of the bytecode of ``func`` and of
+any extra ``version_of`` functions/classes it depends on, so editing the
+preprocessing invalidates the cache on its own. Changes the bytecode cannot
+see (NLTK data, library upgrades) need an explicit ``version`` string.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+CACHE_FORMAT_VERSION = 1
+KEY_SIZE = 16
+
+
+def _code_digest(code: CodeType, hasher) -> None:
+    hasher.update(code.co_code)
+    hasher.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _code_digest(const, hasher)
+        else:
+            hasher.update(repr(const).encode())
+
+
+def function_fingerprint(*objects) -> str:
+    """Hex digest of the code of functions, methods and classes (all their methods)."""
+    hasher = hashlib.blake2b(digest_size=KEY_SIZE)
+    hasher.update(f"format={CACHE_FORMAT_VERSION}".encode())
+    for obj in objects:
+        if obj is None:
+            continue
+        hasher.update(f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', '')}".encode())
+        if isinstance(obj, type):
+            members = [vars(obj)[name] for name in sorted(vars(obj))]
+        else:
+            members = [obj]
+        for member in members:
+            member = getattr(member, "__func__", member)
+            # Callable instances (e.g. FastPreprocessor) count by their __call__
+            code = getattr(member, "__code__", None) or getattr(type(member).__call__, "__code__", None)
+            if code is not None:
+                _code_digest(code, hasher)
+    return hasher.hexdigest()
+
+
+def text_key(text: str, version: str) -> bytes:
+    """Cache key of one raw text under one preprocessing version."""
+    hasher = hashlib.blake2b(version.encode(), digest_size=KEY_SIZE)
+    hasher.update(b"\0")
+    hasher.update(text.encode("utf-8", "surrogatepass"))
+    return hasher.digest()
+
+
+def _apply_chunk(func: Callable[[str], str], texts: Sequence[str]) -> List[str]:
+    return [func(text) for text in texts]
+
+
+def _encode_column(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [value.encode("utf-8", "surrogatepass") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _Segment:
+    """One loaded segment: key -> row, values decoded on demand."""
+
+    __slots__ = ("path", "keys", "data", "offsets")
+
+    def __init__(self, path: Path):
+        with np.load(path) as columns:
+            keys = columns["keys"]
+            self.data = columns["data"].tobytes()
+            self.offsets = columns["offsets"]
+        blob = keys.tobytes()
+        self.path = path
+        self.keys = {blob[i : i + KEY_SIZE]: row for row, i in enumerate(range(0, len(blob), KEY_SIZE))}
+
+    def value(self, row: int) -> str:
+        return self.data[self.offsets[row] : self.offsets[row + 1]].decode("utf-8", "surrogatepass")
+
+
+class PreprocessCache:
+    """
+    On-disk cache of ``func(text)`` for training corpora.
+
+    Args:
+        directory: Cache root; each preprocessing version gets a subdirectory
+        func: Preprocessing function, raw text -> processed text. It must be
+            picklable (a module-level function) when ``workers > 1``
+        version_of: Extra functions/classes whose code ``func`` depends on
+        version: Extra version string (NLTK data, library versions, ...)
+        workers: Processes used to fill misses (1 = in-process)
+        chunk_size: Texts per process-pool task
+        max_segments: Merge segments once there are more than this many
+    """
+
+    def __init__(
+        self,
+        directory,
+        func: Callable[[str], str],
+        version_of: Iterable = (),
+        version: str = "",
+        workers: int = 1,
+        chunk_size: int = 2000,
+        max_segments: int = 8,
+    ):
+        self.func = func
+        self.version = function_fingerprint(func, *version_of) + (f"-{version}" if version else "")
+        self.directory = Path(directory) / hashlib.blake2b(self.version.encode(), digest_size=8).hexdigest()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_segments = max_segments
+        # Rows answered from disk / rows that had to be preprocessed
+        self.hits = 0
+        self.misses = 0
+        self._segments: List[_Segment] | None = None
+
+    def _load(self) -> List[_Segment]:
+        if self._segments is None:
+            paths = sorted(self.directory.glob("segment-*.npz")) if self.directory.exists() else []
+            self._segments = [_Segment(path) for path in paths]
+        return self._segments
+
+    def __len__(self) -> int:
+        return sum(len(segment.keys) for segment in self._load())
+
+    def _compute(self, texts: List[str]) -> List[str]:
+        if self.workers <= 1 or len(texts) <= self.chunk_size:
+            return _apply_chunk(self.func, texts)
+        chunks = [texts[i : i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return [value for chunk in pool.map(partial(_apply_chunk, self.func), chunks) for value in chunk]
+
+    def map(self, texts: Iterable) -> List[str]:
+        """``[func(text) for text in texts]``, computing and storing only uncached texts."""
+        texts = [str(text) for text in texts]
+        keys = [text_key(text, self.version) for text in texts]
+        segments = self._load()
+
+        results: List[str | None] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        for position, key in enumerate(keys):
+            for segment in segments:
+                row = segment.keys.get(key)
+                if row is not None:
+                    results[position] = segment.value(row)
+                    break
+            else:
+                missing.setdefault(key, []).append(position)
+
+        missed = sum(len(positions) for positions in missing.values())
+        self.misses += missed
+        self.hits += len(texts) - missed
+        if missing:
+            missing_keys = list(missing)
+            values = self._compute([texts[missing[key][0]] for key in missing_keys])
+            for key, value in zip(missing_keys, values):
+                for position in missing[key]:
+                    results[position] = value
+            self._append(missing_keys, values)
+        return results
+
+    def _write_segment(self, keys: Sequence[bytes], values: Sequence[str]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data, offsets = _encode_column(values)
+        name = f"segment-{time.time_ns():020d}-{os.getpid()}"
+        tmp_path = self.directory / f".{name}.tmp.npz"
+        np.savez(
+            tmp_path,
+            keys=np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, KEY_SIZE),
+            data=data,
+            offsets=offsets,
+        )
+        path = self.directory / f"{name}.npz"
+        os.replace(tmp_path, path)
+        return path
+
+    def _append(self, keys: Sequence[bytes], values: Sequence[str]):
+        path = self._write_segment(keys, values)
+        self._load().append(_Segment(path))
+        if len(self._segments) > self.max_segments:
+            self.compact()
+
+    def compact(self):
+        """Merge every segment into one."""
+        segments = self._load()
+        if len(segments) <= 1:
+            return
+        merged: Dict[bytes, str] = {}
+        for segment in segments:
+            for key, row in segment.keys.items():
+                merged.setdefault(key, segment.value(row))
+        path = self._write_segment(list(merged), list(merged.values()))
+        for segment in segments:
+            segment.path.unlink(missing_ok=True)
+        self._segments = [_Segment(path)]
+
+    def clear(self):
+        """Delete every stored segment of this version."""
+        for segment in self._load():
+            segment.path.unlink(missing_ok=True)
+        self._segments = []
@@ -4,84 +4,323 @@ Usage examples:
     python run_batch_toxicity_tests.py
     python run_batch_toxicity_tests.py --input-file my_sentences.txt
     python run_batch_toxicity_tests.py --text "Custom sentence to test"
+    python run_batch_toxicity_tests.py --input-file audit.txt --workers 32
+    python run_batch_toxicity_tests.py --input-file audit.jsonl --output results.jsonl --resume
+    python run_batch_toxicity_tests.py --text "Custom sentence" --fast-start --profile-startup
 """
 
 from __future__ import annotations
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import argparse
+import csv
+import json
+import multiprocessing
+import os
+import pickle
 import re
 import sys
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from importlib import metadata as importlib_metadata
+from itertools import islice
 from pathlib import Path
-from typing import List, Sequence
-
-import joblib
-import pandas as pd
-import pickle
-
-try:
-    import nltk
-    from nltk.corpus import stopwords
-    from nltk.stem import WordNetLemmatizer
-    from nltk.tokenize import word_tokenize
-except ImportError as exc:
-    raise SystemExit("Please install nltk to run this script: pip install nltk") from exc
+from typing import Dict, Iterator, List, Sequence, Tuple
 
+# pandas, joblib/sklearn and NLTK are imported where they are first needed:
+# together they take longer to import than the whole model takes to load.
+from cascade_metrics import CascadeMetrics
 from CrawlData.model import ToxicPhraseDetector
+from moderation_policy import DEFAULT_TOXIC_THRESHOLD, ModerationPolicy
+from nb_scoring import NBScoringTable, load_scoring_table
+from text_preprocessing import FastPreprocessor, clean_text, clean_texts
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 MODEL_DIR = PROJECT_ROOT / "saved_models"
 SLANG_PATH = PROJECT_ROOT / "Data" / "slang.csv"
+RESULT_COLUMNS = ["#", "Text", "Label", "Method", "Probability", "Confidence", "SpamIndicator"]
+# NLTK resources and the directory nltk.data.find looks them up in
+NLTK_RESOURCES = {
+    "stopwords": "corpora",
+    "punkt": "tokenizers",
+    "punkt_tab": "tokenizers",
+    "wordnet": "corpora",
+    "averaged_perceptron_tagger": "taggers",
+}
+# Result of the NLTK check plus the stop words and vocabulary lemmas, so later
+# starts need neither the check nor an NLTK import
+NLTK_CACHE_PATH = PROJECT_ROOT / ".dictcache" / "nltk_resources.json"
 
 
-lemmatizer: WordNetLemmatizer | None = None
+lemmatizer = None  # nltk WordNetLemmatizer, created on first use
 stop_words: set[str] | None = None
+preprocessor: FastPreprocessor | None = None
+_cached_lemmas: Dict[str, str] = {}
 
 
-def ensure_nltk_resources():
-    """Download required NLTK corpora if absent and init globals."""
-    for resource in ["stopwords", "punkt", "punkt_tab", "wordnet", "averaged_perceptron_tagger"]:
+class StartupProfile:
+    """Wall-clock time spent in each startup phase (``--profile-startup``)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = [("imports", _IMPORT_SECONDS)]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
         try:
-            nltk.data.find(f"corpora/{resource}")
-        except LookupError:
-            nltk.download(resource, quiet=True)
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - started))
+
+    def report(self):
+        print("Startup profile:")
+        for name, seconds in self.phases:
+            print(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        total = time.perf_counter() - self.started + _IMPORT_SECONDS
+        print(f"  {'total (wall clock)':<24} {total * 1000:8.1f} ms")
+        print()
+
+
+@contextmanager
+def _no_profile(name: str):
+    yield
+
+
+def _import_nltk():
+    try:
+        import nltk
+    except ImportError as exc:
+        raise SystemExit("Please install nltk to run this script: pip install nltk") from exc
+    return nltk
+
+
+def _nltk_version() -> str:
+    try:
+        return importlib_metadata.version("nltk")
+    except importlib_metadata.PackageNotFoundError as exc:
+        raise SystemExit("Please install nltk to run this script: pip install nltk") from exc
+
+
+def _read_nltk_cache(version: str) -> Dict | None:
+    try:
+        with open(NLTK_CACHE_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("nltk_version") != version or not cached.get("stop_words"):
+        return None
+    return cached
+
 
-    global lemmatizer, stop_words
+def _write_nltk_cache(cached: Dict):
+    try:
+        NLTK_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = NLTK_CACHE_PATH.with_name(f"{NLTK_CACHE_PATH.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.replace(tmp_path, NLTK_CACHE_PATH)
+    except OSError as exc:
+        print(f"Could not write NLTK cache {NLTK_CACHE_PATH}: {exc}")
+
+
+def ensure_nltk_resources():
+    """Download required NLTK corpora if absent and init globals.
+
+    The check runs once per NLTK version; its result is cached in
+    NLTK_CACHE_PATH together with the stop word list.
+    """
+    global stop_words, _cached_lemmas
+    version = _nltk_version()
+    cached = _read_nltk_cache(version)
+    if cached is None:
+        nltk = _import_nltk()
+        for resource, category in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(f"{category}/{resource}")
+            except LookupError:
+                if not nltk.download(resource, quiet=True):
+                    print(f"Could not download NLTK resource: {resource}")
+        from nltk.corpus import stopwords
+
+        cached = {"nltk_version": version, "stop_words": sorted(stopwords.words("english")), "lemmas": {}}
+        _write_nltk_cache(cached)
+
+    if stop_words is None:
+        stop_words = set(cached["stop_words"])
+    _cached_lemmas = cached.get("lemmas", {})
+
+
+def _save_lemma_cache(lemmas: Dict[str, str]):
+    """Remember vocabulary lemmas so the next start skips WordNet."""
+    global _cached_lemmas
+    if not lemmas or lemmas.items() <= _cached_lemmas.items():
+        return
+    cached = _read_nltk_cache(_nltk_version())
+    if cached is None:
+        return
+    cached["lemmas"] = {**cached.get("lemmas", {}), **lemmas}
+    _cached_lemmas = cached["lemmas"]
+    _write_nltk_cache(cached)
+
+
+def lemmatize(word: str) -> str:
+    global lemmatizer
     if lemmatizer is None:
+        _import_nltk()
+        from nltk.stem import WordNetLemmatizer
+
         lemmatizer = WordNetLemmatizer()
-    if stop_words is None:
-        stop_words = set(stopwords.words("english"))
+    return lemmatizer.lemmatize(word)
 
 
-def normalize_repeated_chars(text: str, max_repeats: int = 2) -> str:
-    pattern = re.compile(rf"([a-zA-Z])\1{{{max_repeats},}}")
-    return pattern.sub(lambda m: m.group(1) * max_repeats, text)
+def _word_tokenize(text: str) -> List[str]:
+    _import_nltk()
+    from nltk.tokenize import word_tokenize
+
+    return word_tokenize(text)
 
 
-def clean_text(text: str) -> str:
-    text = str(text).lower()
-    text = normalize_repeated_chars(text)
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"@\w+|#\w+", "", text)
-    text = re.sub(r"&\w+;|&#\d+;", "", text)
-    text = re.sub(r"[^a-zA-Z\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+def get_preprocessor() -> FastPreprocessor | None:
+    """Shared FastPreprocessor built from the NLTK globals, once they are set."""
+    global preprocessor
+    if preprocessor is None and stop_words is not None:
+        preprocessor = FastPreprocessor(lemmatize, stop_words, fallback_tokenize=_word_tokenize)
+    return preprocessor
 
 
 def preprocess_text(text: str) -> str:
     try:
-        if lemmatizer is None or stop_words is None:
+        fast = get_preprocessor()
+        if fast is None:
             return text
-        tokens = word_tokenize(text)
-        tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words and len(word) > 2]
-        return " ".join(tokens)
+        return fast(text)
     except Exception:
         return text
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def keyword_trie_pattern(keywords: Sequence[str]) -> str:
+    """Regex matching any of ``keywords``, with shared prefixes merged into a trie.
+
+    The regex engine then follows a single branch per text position instead
+    of trying every keyword in turn.
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def fuse_patterns(patterns: Sequence[re.Pattern], first_chars: str) -> re.Pattern:
+    """Single regex that matches wherever any of ``patterns`` matches.
+
+    ``first_chars`` is a character-class body covering every character the
+    patterns can start with; it lets the engine skip all other positions.
+    """
+    branches = []
+    for pattern in patterns:
+        if pattern.flags & re.IGNORECASE:
+            branches.append(f"(?i:{pattern.pattern})")
+        else:
+            branches.append(f"(?:{pattern.pattern})")
+    return re.compile(f"(?=[{first_chars}])(?:{'|'.join(branches)})")
+
+
+def normalize_for_cache(text: str) -> str:
+    """Cache key for non-spam texts: lowercased, whitespace-collapsed text.
+
+    This is the exact input of the rule detector, and ``clean_text`` of it
+    equals ``clean_text`` of the raw text, so two texts with the same key get
+    the same rule-based and ML results.
+    """
+    return _WHITESPACE_RE.sub(" ", str(text).lower()).strip()
+
+
+class ResultCache:
+    """Thread-safe bounded LRU cache with optional TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_size: int = 10000, ttl: float | None = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
 class HybridToxicClassifier:
-    """Hybrid classifier combining Rule-based filter + ML model with tiered labels."""
+    """Hybrid classifier combining Rule-based filter + ML model with tiered labels.
+
+    Thresholds live in a ModerationPolicy. ``self.policy`` is used by default;
+    predict/predict_batch accept another policy per call (or per text), so
+    one loaded classifier can serve tenants with different strictness.
+    """
 
     DEFAULT_SPAM_KEYWORDS = (
         # Common spam triggers
@@ -157,6 +396,8 @@ class HybridToxicClassifier:
     REPEATED_EXCLAMATION_PATTERN = re.compile(r"!{2,}")
     MONEY_PATTERN = re.compile(r"\$\d+|\d+\s*(?:đô|dollar|usd|vnd|đồng)", re.IGNORECASE)
     CAPS_WORDS_PATTERN = re.compile(r"\b[A-Z]{4,}\b")
+    # Every character URL/PHONE/REPEATED_EXCLAMATION/MONEY patterns can start with
+    SPAM_PATTERN_FIRST_CHARS = r"hHwW.\[+$!\d"
 
     def __init__(
         self,
@@ -167,44 +408,90 @@ class HybridToxicClassifier:
         warning_threshold: float = 0.6,
         violation_threshold: float | None = 0.8,
         spam_keywords=None,
+        cache_size: int = 0,
+        cache_ttl: float | None = None,
+        scoring_table: NBScoringTable | None = None,
+        metrics: CascadeMetrics | None = None,
+        toxic_threshold: float | None = None,
     ):
         if violation_threshold is None:
             violation_threshold = 0.8
-        if warning_threshold >= violation_threshold:
-            raise ValueError("warning_threshold must be lower than violation_threshold")
+        if toxic_threshold is None:
+            toxic_threshold = getattr(rule_detector, "toxic_threshold", DEFAULT_TOXIC_THRESHOLD)
 
         self.ml_model = ml_model
         self.vectorizer = vectorizer
+        # Folded vectorizer + model; when set, scoring bypasses sklearn
+        self.scoring_table = scoring_table
         self.rule_detector = rule_detector
-        self.warning_threshold = warning_threshold
-        self.violation_threshold = violation_threshold
-        self.ml_threshold = violation_threshold
+        self.policy = ModerationPolicy(warning_threshold, violation_threshold, toxic_threshold)
         self.spam_keywords = tuple(spam_keywords) if spam_keywords else self.DEFAULT_SPAM_KEYWORDS
+        self._compile_spam_rules()
+        # Optional result cache for non-spam texts (cache_size=0 disables it)
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size else None
+        self._cache_fingerprint = None
+        # Stage instrumentation; None (the default) disables it
+        self.metrics = metrics
+
+    @property
+    def warning_threshold(self) -> float:
+        return self.policy.warning_threshold
+
+    @warning_threshold.setter
+    def warning_threshold(self, value: float):
+        self.policy = ModerationPolicy.from_dict({"warning_threshold": value}, base=self.policy)
+
+    @property
+    def violation_threshold(self) -> float:
+        return self.policy.violation_threshold
+
+    @violation_threshold.setter
+    def violation_threshold(self, value: float):
+        self.policy = ModerationPolicy.from_dict({"violation_threshold": value}, base=self.policy)
+
+    @property
+    def ml_threshold(self) -> float:
+        return self.policy.violation_threshold
+
+    def _compile_spam_rules(self):
+        """Compile the keyword trie and the fused pattern gate used by _detect_spam."""
+        self._keyword_gate = re.compile(keyword_trie_pattern(self.spam_keywords)) if self.spam_keywords else None
+        self._pattern_gate = fuse_patterns(
+            [self.URL_PATTERN, self.PHONE_PATTERN, self.REPEATED_EXCLAMATION_PATTERN, self.MONEY_PATTERN],
+            self.SPAM_PATTERN_FIRST_CHARS,
+        )
 
     def _detect_spam(self, raw_text: str):
-        """Enhanced heuristic-based spam/scam detector forcing VIOLATION."""
+        """Enhanced heuristic-based spam/scam detector forcing VIOLATION.
+
+        One compiled pass per rule group decides whether anything can match;
+        only texts that hit a group run the ordered checks, so the reported
+        indicator follows the same priority as before.
+        """
         text_lower = raw_text.lower()
         
         # Check for spam keywords
-        for keyword in self.spam_keywords:
-            if keyword in text_lower:
-                return f"keyword:{keyword}"
-        
-        # Check for URLs/links
-        if self.URL_PATTERN.search(raw_text):
-            return "contains_link"
-        
-        # Check for phone numbers
-        if self.PHONE_PATTERN.search(raw_text):
-            return "contact_number"
-        
-        # Check for excessive punctuation (2+ exclamation marks)
-        if self.REPEATED_EXCLAMATION_PATTERN.search(raw_text):
-            return "excessive_punctuation"
+        if self._keyword_gate is not None and self._keyword_gate.search(text_lower):
+            for keyword in self.spam_keywords:
+                if keyword in text_lower:
+                    return f"keyword:{keyword}"
         
-        # Check for money mentions (common in scams)
-        if self.MONEY_PATTERN.search(raw_text):
-            return "money_mention"
+        if self._pattern_gate.search(raw_text):
+            # Check for URLs/links
+            if self.URL_PATTERN.search(raw_text):
+                return "contains_link"
+
+            # Check for phone numbers
+            if self.PHONE_PATTERN.search(raw_text):
+                return "contact_number"
+
+            # Check for excessive punctuation (2+ exclamation marks)
+            if self.REPEATED_EXCLAMATION_PATTERN.search(raw_text):
+                return "excessive_punctuation"
+
+            # Check for money mentions (common in scams)
+            if self.MONEY_PATTERN.search(raw_text):
+                return "money_mention"
         
         # Check for excessive capital letters (common in spam)
         caps_words = self.CAPS_WORDS_PATTERN.findall(raw_text)
@@ -213,60 +500,42 @@ class HybridToxicClassifier:
         
         return None
 
-    def _label_from_probability(self, probability: float):
-        if probability > self.violation_threshold:
-            return "VIOLATION", True
-        if probability >= self.warning_threshold:
-            return "WARNING", False
-        return "SAFE", False
-
-    def predict(self, text, return_details=False):
-        rule_phrases = []
-        spam_indicator = self._detect_spam(text)
-        if spam_indicator:
-            return {
-                "text": text,
-                "is_violation": True,
-                "label": "VIOLATION",
-                "method": "spam_filter",
-                "ml_probability": None,
-                "confidence": 0.92,
-                "toxic_phrases": [],
-                "spam_indicator": spam_indicator,
-                "details": "Detected promotional / spam content",
-            }
+    def _label_from_probability(self, probability: float, policy: ModerationPolicy | None = None):
+        return (policy or self.policy).label(probability)
 
-        if self.rule_detector is not None:
-            try:
-                rule_result = self.rule_detector.detect(text, return_details=True)
-                if rule_result.get("is_toxic", False):
-                    return {
-                        "text": text,
-                        "is_violation": True,
-                        "label": "VIOLATION",
-                        "method": "rule_based",
-                        "ml_probability": None,
-                        "confidence": 0.95,
-                        "toxic_phrases": rule_result.get("toxic_phrases", []),
-                        "spam_indicator": None,
-                        "details": "Detected by rule-based filter",
-                    }
-                rule_phrases = rule_result.get("toxic_phrases", [])
-            except Exception as exc:  # pragma: no cover - defensive logging
-                print(f"Rule detector error: {exc}")
+    @staticmethod
+    def _spam_result(text, spam_indicator):
+        return {
+            "text": text,
+            "is_violation": True,
+            "label": "VIOLATION",
+            "method": "spam_filter",
+            "ml_probability": None,
+            "confidence": 0.92,
+            "toxic_phrases": [],
+            "spam_indicator": spam_indicator,
+            "details": "Detected promotional / spam content",
+        }
 
-        cleaned = clean_text(text)
-        processed = preprocess_text(cleaned)
-        vectorized = self.vectorizer.transform([processed])
-        ml_probability = float(self.ml_model.predict_proba(vectorized)[0][1])
+    @staticmethod
+    def _rule_result(text, toxic_phrases):
+        return {
+            "text": text,
+            "is_violation": True,
+            "label": "VIOLATION",
+            "method": "rule_based",
+            "ml_probability": None,
+            "confidence": 0.95,
+            "toxic_phrases": toxic_phrases,
+            "spam_indicator": None,
+            "details": "Detected by rule-based filter",
+        }
 
-        label, is_violation = self._label_from_probability(ml_probability)
+    def _ml_result(self, text, ml_probability: float, rule_phrases, policy: ModerationPolicy | None = None):
+        policy = policy or self.policy
+        label, is_violation = policy.label(ml_probability)
         confidence = ml_probability if label != "SAFE" else (1 - ml_probability)
-        details = (
-            f"Prob={ml_probability:.4f} | tiers -> SAFE < {self.warning_threshold:.2f}, "
-            f"WARNING [{self.warning_threshold:.2f}, {self.violation_threshold:.2f}], "
-            f"VIOLATION > {self.violation_threshold:.2f}"
-        )
+        details = f"Prob={ml_probability:.4f} | tiers -> {policy.describe_tiers()}"
         return {
             "text": text,
             "is_violation": is_violation,
@@ -280,23 +549,347 @@ class HybridToxicClassifier:
             "risk_level": label,
         }
 
+    def _current_fingerprint(self):
+        # Everything a cached result depends on; the detector snapshot changes
+        # whenever the dictionary is reloaded or edited.
+        snapshot = getattr(self.rule_detector, "snapshot", self.rule_detector)
+        return (
+            self.ml_model,
+            self.vectorizer,
+            self.scoring_table,
+            snapshot,
+        )
+
+    def _validate_cache(self):
+        fingerprint = self._current_fingerprint()
+        previous = self._cache_fingerprint
+        if previous is None or len(previous) != len(fingerprint) or any(
+            a is not b and a != b for a, b in zip(previous, fingerprint)
+        ):
+            self.cache.clear()
+            self._cache_fingerprint = fingerprint
+
+    def invalidate_cache(self):
+        """Drop cached results (e.g. after the ML model was updated in place)."""
+        if self.cache is not None:
+            self.cache.clear()
+
+    def cache_stats(self) -> Dict[str, int] | None:
+        return self.cache.stats() if self.cache is not None else None
+
+    @staticmethod
+    def _from_cache(text, cached):
+        return {**cached, "text": text, "toxic_phrases": list(cached["toxic_phrases"])}
 
-def load_hybrid_classifier():
+    def _cache_key(self, text, policy: ModerationPolicy):
+        # Cached results are final labels, so they are per policy
+        return (policy.key, normalize_for_cache(text))
+
+    def _rule_threshold(self, policy: ModerationPolicy):
+        """toxic_threshold to pass to the rule detector, or None for its own."""
+        threshold = policy.toxic_threshold
+        if threshold == getattr(self.rule_detector, "toxic_threshold", None):
+            return None
+        return threshold
+
+    def _check_policy(self, policy: ModerationPolicy) -> ModerationPolicy:
+        """Reject a policy the loaded rule detector cannot serve, before any stage runs."""
+        loaded = getattr(self.rule_detector, "toxic_threshold", None)
+        if loaded is not None and policy.toxic_threshold < loaded:
+            raise ValueError(
+                f"Policy {policy.name!r} has toxic_threshold {policy.toxic_threshold}, below {loaded}, "
+                f"the threshold the rule detector was loaded with"
+            )
+        return policy
+
+    def _resolve_policies(self, policies, count: int) -> List[ModerationPolicy]:
+        if policies is None or isinstance(policies, ModerationPolicy):
+            return [self._check_policy(policies or self.policy)] * count
+        if len(policies) != count:
+            raise ValueError("policies must be a single policy or have one entry per text")
+        resolved = [policy or self.policy for policy in policies]
+        for policy in {id(policy): policy for policy in resolved}.values():
+            self._check_policy(policy)
+        return resolved
+
+    def predict(self, text, return_details=False, policy: ModerationPolicy | None = None):
+        policy = self._check_policy(policy or self.policy)
+        metrics = self.metrics
+        if metrics is None:
+            return self._predict(text, policy=policy)
+        started = time.perf_counter()
+        result = self._predict(text, metrics, policy)
+        metrics.record_requests([len(text)], time.perf_counter() - started)
+        return result
+
+    def _predict(self, text, metrics: CascadeMetrics | None = None, policy: ModerationPolicy | None = None):
+        policy = policy or self.policy
+        started = time.perf_counter() if metrics is not None else 0.0
+        spam_indicator = self._detect_spam(text)
+        if metrics is not None:
+            metrics.record_stage("spam_filter", time.perf_counter() - started, short_circuits=int(bool(spam_indicator)))
+        if spam_indicator:
+            return self._spam_result(text, spam_indicator)
+
+        if self.cache is None:
+            return self._predict_non_spam(text, metrics, policy)
+
+        started = time.perf_counter() if metrics is not None else 0.0
+        self._validate_cache()
+        key = self._cache_key(text, policy)
+        cached = self.cache.get(key)
+        if metrics is not None:
+            metrics.record_stage("cache", time.perf_counter() - started, short_circuits=int(cached is not None))
+        if cached is not None:
+            return self._from_cache(text, cached)
+        result = self._predict_non_spam(text, metrics, policy)
+        self.cache.put(key, self._from_cache(text, result))
+        return result
+
+    def _predict_non_spam(self, text, metrics: CascadeMetrics | None = None, policy: ModerationPolicy | None = None):
+        policy = policy or self.policy
+        rule_phrases = []
+        if self.rule_detector is not None:
+            started = time.perf_counter() if metrics is not None else 0.0
+            is_toxic = False
+            threshold = self._rule_threshold(policy)
+            try:
+                if threshold is None:
+                    rule_result = self.rule_detector.detect(text, return_details=True)
+                else:
+                    rule_result = self.rule_detector.detect(text, return_details=True, toxic_threshold=threshold)
+                is_toxic = rule_result.get("is_toxic", False)
+                if not is_toxic:
+                    rule_phrases = rule_result.get("toxic_phrases", [])
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"Rule detector error: {exc}")
+            if metrics is not None:
+                metrics.record_stage("rule_detector", time.perf_counter() - started, short_circuits=int(is_toxic))
+            if is_toxic:
+                return self._rule_result(text, rule_result.get("toxic_phrases", []))
+
+        started = time.perf_counter() if metrics is not None else 0.0
+        cleaned = clean_text(text)
+        processed = preprocess_text(cleaned)
+        if metrics is not None:
+            scoring_started = time.perf_counter()
+            metrics.record_stage("preprocessing", scoring_started - started)
+        ml_probability = float(self._ml_probabilities([processed])[0])
+        if metrics is not None:
+            metrics.record_stage("ml_scoring", time.perf_counter() - scoring_started)
+        return self._ml_result(text, ml_probability, rule_phrases, policy)
+
+    def _ml_probabilities(self, processed: Sequence[str]):
+        """Violation probability for preprocessed texts."""
+        if self.scoring_table is not None:
+            return self.scoring_table.predict_proba(processed)
+        vectorized = self.vectorizer.transform(processed)
+        return self.ml_model.predict_proba(vectorized)[:, 1]
+
+    def _detect_rules_batch(self, texts: Sequence[str], thresholds: Sequence | None = None) -> List[Dict]:
+        """Rule-detector results for texts, batched when the detector supports it.
+
+        ``thresholds`` holds one _rule_threshold per text (None: all default).
+        """
+        batch_detect = getattr(self.rule_detector, "batch_detect", None)
+        if batch_detect is None:
+            if thresholds is None:
+                return [self.rule_detector.detect(text, return_details=True) for text in texts]
+            return [
+                self.rule_detector.detect(text, return_details=True)
+                if threshold is None
+                else self.rule_detector.detect(text, return_details=True, toxic_threshold=threshold)
+                for text, threshold in zip(texts, thresholds)
+            ]
+        if thresholds is None:
+            frame = batch_detect(list(texts))
+        else:
+            frame = batch_detect(list(texts), toxic_threshold=list(thresholds))
+        return [
+            {"is_toxic": bool(is_toxic), "toxic_phrases": list(phrases)}
+            for is_toxic, phrases in zip(frame["is_toxic"], frame["toxic_phrases"])
+        ]
+
+    def predict_batch(self, texts: Sequence[str], policies=None) -> List[Dict]:
+        """Classify many texts at once; results are identical to calling predict per text.
+
+        The cascade runs stage by stage over the whole batch: the spam filter
+        and rule detector first, then only the texts that fall through to the
+        ML model are vectorized into one sparse matrix and scored with a
+        single ``predict_proba`` call. With the result cache enabled, cache
+        hits and repeats within the batch skip the rule and ML stages.
+
+        ``policies`` is a single ModerationPolicy or one per text (None
+        entries use ``self.policy``); texts of different tenants share every
+        stage of the batch.
+        """
+        text_policies = self._resolve_policies(policies, len(texts))
+        metrics = self.metrics
+        batch_started = started = time.perf_counter() if metrics is not None else 0.0
+        results: List[Dict | None] = [None] * len(texts)
+        pending = []
+        for idx, text in enumerate(texts):
+            spam_indicator = self._detect_spam(text)
+            if spam_indicator:
+                results[idx] = self._spam_result(text, spam_indicator)
+            else:
+                pending.append(idx)
+        if metrics is not None:
+            started = self._record_batch_stage(metrics, "spam_filter", started, len(texts), len(pending))
+
+        # Serve cache hits and only compute the first text of each key
+        duplicates: Dict[int, List[int]] = {}
+        keys: Dict[int, str] = {}
+        if self.cache is not None and pending:
+            self._validate_cache()
+            first_by_key: Dict[str, int] = {}
+            misses = []
+            for idx in pending:
+                key = self._cache_key(texts[idx], text_policies[idx])
+                if key in first_by_key:
+                    duplicates[first_by_key[key]].append(idx)
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[idx] = self._from_cache(texts[idx], cached)
+                    continue
+                first_by_key[key] = idx
+                keys[idx] = key
+                duplicates[idx] = []
+                misses.append(idx)
+            if metrics is not None:
+                started = self._record_batch_stage(metrics, "cache", started, len(pending), len(misses))
+            pending = misses
+        computed = list(pending)
+
+        rule_phrases = {idx: [] for idx in pending}
+        rule_failed = False
+        if self.rule_detector is not None and pending:
+            # Policies were checked in _resolve_policies, so an error below
+            # is a detector failure, not a bad threshold from the caller
+            thresholds = [self._rule_threshold(text_policies[idx]) for idx in pending]
+            if all(threshold is None for threshold in thresholds):
+                thresholds = None
+            try:
+                rule_results = self._detect_rules_batch([texts[idx] for idx in pending], thresholds)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"Rule detector error: {exc}")
+                rule_failed = True
+            else:
+                remaining = []
+                for idx, rule_result in zip(pending, rule_results):
+                    if rule_result.get("is_toxic", False):
+                        results[idx] = self._rule_result(texts[idx], rule_result.get("toxic_phrases", []))
+                    else:
+                        rule_phrases[idx] = rule_result.get("toxic_phrases", [])
+                        remaining.append(idx)
+                if metrics is not None:
+                    started = self._record_batch_stage(metrics, "rule_detector", started, len(pending), len(remaining))
+                pending = remaining
+
+        if pending:
+            if metrics is not None:
+                started = time.perf_counter()
+            processed = [preprocess_text(cleaned) for cleaned in clean_texts([texts[idx] for idx in pending])]
+            if metrics is not None:
+                started = self._record_batch_stage(metrics, "preprocessing", started, len(pending), len(pending))
+            probabilities = self._ml_probabilities(processed)
+            if metrics is not None:
+                self._record_batch_stage(metrics, "ml_scoring", started, len(pending), len(pending))
+            for idx, ml_probability in zip(pending, probabilities.tolist()):
+                results[idx] = self._ml_result(texts[idx], float(ml_probability), rule_phrases[idx], text_policies[idx])
+
+        if self.cache is not None:
+            for idx in computed:
+                cached = self._from_cache(texts[idx], results[idx])
+                # ML-only results from a failed rule stage are not cached
+                if not rule_failed:
+                    self.cache.put(keys[idx], cached)
+                for duplicate in duplicates[idx]:
+                    results[duplicate] = self._from_cache(texts[duplicate], cached)
+
+        if metrics is not None and texts:
+            # Per-text latency in a batch is the batch time shared equally
+            elapsed = time.perf_counter() - batch_started
+            metrics.record_requests([len(text) for text in texts], elapsed / len(texts))
+        return results
+
+    @staticmethod
+    def _record_batch_stage(metrics: CascadeMetrics, stage: str, started: float, calls: int, passed: int) -> float:
+        """Record a batch stage that got ``calls`` texts and passed ``passed`` on; returns the end time."""
+        finished = time.perf_counter()
+        metrics.record_stage(stage, finished - started, calls=calls, short_circuits=calls - passed)
+        return finished
+
+
+def load_hybrid_classifier(
+    verbose: bool = True,
+    cache_size: int = 0,
+    profile: StartupProfile | None = None,
+    prewarm_lemmas: bool = True,
+    rule_threshold: float = DEFAULT_TOXIC_THRESHOLD,
+):
+    """Load the saved artifacts (in parallel) and build the classifier.
+
+    When an up-to-date scoring table was exported next to the sklearn
+    artifacts (see nb_scoring.py), the sklearn pickles are not loaded at all.
+    With ``prewarm_lemmas=False`` vocabulary lemmas that are not cached yet
+    are computed on first use instead of at startup.
+
+    The rule detector is loaded with ``rule_threshold``, the lowest
+    toxic_threshold any ModerationPolicy may use; the classifier's own policy
+    keeps the default toxic_threshold.
+    """
     model_path = MODEL_DIR / "naive_bayes_tuned_balanced.pkl"
     vectorizer_path = MODEL_DIR / "tfidf_vectorizer.pkl"
     metadata_path = MODEL_DIR / "hybrid_model_metadata_optimized.pkl"
+    phase = profile.phase if profile is not None else _no_profile
+
+    def load_metadata():
+        with phase("metadata"), open(metadata_path, "rb") as f:
+            return pickle.load(f)
+
+    def load_model():
+        with phase("scoring table"):
+            scoring_table = load_scoring_table(MODEL_DIR, sources=(model_path, vectorizer_path))
+        if scoring_table is not None:
+            return None, None, scoring_table
+        with phase("sklearn model"):
+            import joblib
 
-    ml_model = joblib.load(model_path)
-    vectorizer = joblib.load(vectorizer_path)
-    with open(metadata_path, "rb") as f:
-        metadata = pickle.load(f)
+            ml_model = joblib.load(model_path)
+            vectorizer = joblib.load(vectorizer_path)
+            return ml_model, vectorizer, load_scoring_table(MODEL_DIR, vectorizer, ml_model)
+
+    def load_rule_detector():
+        if not SLANG_PATH.exists():
+            return None
+        with phase("rule detector"):
+            return ToxicPhraseDetector(SLANG_PATH, toxic_threshold=rule_threshold, verbose=verbose)
+
+    with phase("load artifacts (parallel)"), ThreadPoolExecutor(max_workers=3) as pool:
+        metadata_future = pool.submit(load_metadata)
+        model_future = pool.submit(load_model)
+        rule_detector_future = pool.submit(load_rule_detector)
+        metadata = metadata_future.result()
+        ml_model, vectorizer, scoring_table = model_future.result()
+        rule_detector = rule_detector_future.result()
 
     warning_threshold = metadata.get("policy_warning_threshold", 0.6)
     violation_threshold = metadata.get("policy_violation_threshold", 0.8)
 
-    rule_detector = None
-    if SLANG_PATH.exists():
-        rule_detector = ToxicPhraseDetector(SLANG_PATH)
+    fast = get_preprocessor()
+    if fast is not None:
+        with phase("lemma table"):
+            vocabulary = scoring_table.terms if scoring_table is not None else vectorizer.vocabulary_
+            if prewarm_lemmas:
+                try:
+                    fast.add_vocabulary(vocabulary, known=_cached_lemmas)
+                except LookupError as exc:  # missing WordNet data, as in preprocess_text
+                    print(f"Could not precompute lemmas: {exc}")
+                _save_lemma_cache(fast.lemma_table)
+            else:
+                fast.lemma_table.update(_cached_lemmas)
 
     classifier = HybridToxicClassifier(
         ml_model=ml_model,
@@ -304,15 +897,20 @@ def load_hybrid_classifier():
         rule_detector=rule_detector,
         warning_threshold=warning_threshold,
         violation_threshold=violation_threshold,
+        cache_size=cache_size,
+        scoring_table=scoring_table,
+        toxic_threshold=max(DEFAULT_TOXIC_THRESHOLD, rule_threshold),
     )
 
-    print("✓ Hybrid classifier rebuilt from saved artifacts")
-    print(f"  Model: {metadata['model_name']}")
-    print(f"  F1-score: {metadata['f1_score']:.4f}")
-    print(f"  Warning threshold: {warning_threshold}")
-    print(f"  Violation threshold: {violation_threshold}")
-    print(f"  Rule-based filter: {rule_detector is not None}")
-    print()
+    if verbose:
+        print("✓ Hybrid classifier rebuilt from saved artifacts")
+        print(f"  Model: {metadata['model_name']}")
+        print(f"  F1-score: {metadata['f1_score']:.4f}")
+        print(f"  Warning threshold: {warning_threshold}")
+        print(f"  Violation threshold: {violation_threshold}")
+        print(f"  Rule-based filter: {rule_detector is not None}")
+        print(f"  Direct NB scoring: {scoring_table is not None}")
+        print()
     return classifier, metadata
 
 
@@ -367,40 +965,259 @@ def iter_inputs(args: argparse.Namespace) -> List[str]:
     ]
 
 
-def run_batch(classifier, sentences: Sequence[str]) -> pd.DataFrame:
+# Classifier used by pool workers. The parent sets it before the pool starts,
+# so forked workers inherit it; spawned workers load it in _init_worker.
+_worker_classifier: HybridToxicClassifier | None = None
+
+
+def _init_worker():
+    global _worker_classifier
+    if _worker_classifier is None:
+        ensure_nltk_resources()
+        _worker_classifier, _ = load_hybrid_classifier(verbose=False)
+
+
+def _predict_chunk(chunk: Sequence[str]) -> List[Dict]:
+    return _worker_classifier.predict_batch(chunk)
+
+
+def predict_parallel(
+    classifier, sentences: Sequence[str], workers: int, chunk_size: int | None = None
+) -> Iterator[Dict]:
+    """Classify sentences on a process pool, yielding results in input order."""
+    global _worker_classifier
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, len(sentences) // (workers * 4)))
+    chunks = [sentences[start:start + chunk_size] for start in range(0, len(sentences), chunk_size)]
+
+    _worker_classifier = classifier
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            for chunk_results in pool.imap(_predict_chunk, chunks):
+                yield from chunk_results
+    finally:
+        _worker_classifier = None
+
+
+def result_row(idx: int, text: str, result: Dict) -> Dict:
+    ml_prob = result.get("ml_probability")
+    return {
+        "#": idx,
+        "Text": text[:60] + ("..." if len(text) > 60 else ""),
+        "Label": result["label"],
+        "Method": result["method"],
+        "Probability": f"{ml_prob:.4f}" if ml_prob is not None else "N/A",
+        "Confidence": f"{result['confidence']:.4f}",
+        "SpamIndicator": result.get("spam_indicator") or "-",
+    }
+
+
+def print_result(idx: int, text: str, result: Dict):
+    ml_prob = result.get("ml_probability")
+    print(f"Test #{idx}")
+    badge = "🔴" if result["label"] == "VIOLATION" else ("🟠" if result["label"] == "WARNING" else "🟢")
+    print(f"Text: {text}")
+    print(f"Label: {result['label']} {badge}")
+    print(f"Method: {result['method']}")
+    if ml_prob is not None:
+        print(f"ML Probability: {ml_prob:.4f} ({ml_prob * 100:.2f}%)")
+    print(f"Confidence: {result['confidence']:.4f} ({result['confidence'] * 100:.2f}%)")
+    if result.get("spam_indicator"):
+        print(f"Spam Indicator: {result['spam_indicator']}")
+    if result.get("toxic_phrases"):
+        print(f"⚠️ Toxic Phrases: {', '.join(result['toxic_phrases'])}")
+    print("-" * 80)
+
+
+def run_batch(
+    classifier, sentences: Sequence[str], workers: int = 1, chunk_size: int | None = None
+) -> pd.DataFrame:
+    if workers > 1 and len(sentences) > 1:
+        results = predict_parallel(classifier, sentences, workers, chunk_size)
+    else:
+        results = classifier.predict_batch(sentences)
+
     rows = []
-    for idx, text in enumerate(sentences, start=1):
-        result = classifier.predict(text)
-        ml_prob = result.get("ml_probability")
-        rows.append(
-            {
-                "#": idx,
-                "Text": text[:60] + ("..." if len(text) > 60 else ""),
-                "Label": result["label"],
-                "Method": result["method"],
-                "Probability": f"{ml_prob:.4f}" if ml_prob is not None else "N/A",
-                "Confidence": f"{result['confidence']:.4f}",
-                "SpamIndicator": result.get("spam_indicator") or "-",
-            }
-        )
+    for idx, (text, result) in enumerate(zip(sentences, results), start=1):
+        rows.append(result_row(idx, text, result))
+        print_result(idx, text, result)
 
-        print(f"Test #{idx}")
-        badge = "🔴" if result["label"] == "VIOLATION" else ("🟠" if result["label"] == "WARNING" else "🟢")
-        print(f"Text: {text}")
-        print(f"Label: {result['label']} {badge}")
-        print(f"Method: {result['method']}")
-        if ml_prob is not None:
-            print(f"ML Probability: {ml_prob:.4f} ({ml_prob * 100:.2f}%)")
-        print(f"Confidence: {result['confidence']:.4f} ({result['confidence'] * 100:.2f}%)")
-        if result.get("spam_indicator"):
-            print(f"Spam Indicator: {result['spam_indicator']}")
-        if result.get("toxic_phrases"):
-            print(f"⚠️ Toxic Phrases: {', '.join(result['toxic_phrases'])}")
-        print("-" * 80)
+    import pandas as pd
 
     return pd.DataFrame(rows)
 
 
+def detect_input_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    return "text"
+
+
+def iter_records(
+    path: Path, input_format: str = "auto", text_field: str = "text", start_offset: int = 0
+) -> Iterator[Tuple[int, str]]:
+    """Lazily yield (byte offset after the record, text) for each non-empty record.
+
+    Reading starts at ``start_offset``; for CSV input the header is always read
+    from the top of the file first.
+    """
+    if input_format == "auto":
+        input_format = detect_input_format(path)
+
+    with path.open("rb") as f:
+        if input_format == "csv":
+            header = next(csv.reader([f.readline().decode("utf-8")]), [])
+            if text_field not in header:
+                raise ValueError(f"Column '{text_field}' not found in {path} (columns: {header})")
+            column = header.index(text_field)
+        if start_offset > f.tell():
+            f.seek(start_offset)
+        offset = f.tell()
+
+        if input_format == "csv":
+
+            def decoded_lines():
+                nonlocal offset
+                for raw in f:
+                    offset += len(raw)
+                    yield raw.decode("utf-8")
+
+            # csv.reader never reads past the end of the record it returns,
+            # so `offset` is exactly the end of the current record.
+            for row in csv.reader(decoded_lines()):
+                if column < len(row) and row[column].strip():
+                    yield offset, row[column].strip()
+            return
+
+        for raw in f:
+            offset += len(raw)
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            if input_format == "jsonl":
+                text = str(json.loads(line).get(text_field) or "").strip()
+                if text:
+                    yield offset, text
+            else:
+                yield offset, line
+
+
+class StreamingResultWriter:
+    """Append result rows to a JSONL or CSV file with a resumable checkpoint.
+
+    After every micro-batch the rows are flushed and ``<output>.ckpt`` records
+    the input offset, the number of records done and the output size. Resuming
+    truncates the output back to the checkpointed size, so a crash never leaves
+    duplicated or partial rows behind.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self.checkpoint_path = path.with_name(path.name + ".ckpt")
+        self.output_format = "csv" if path.suffix.lower() == ".csv" else "jsonl"
+        self.input_offset = 0
+        self.records = 0
+
+        if resume and self.checkpoint_path.exists():
+            state = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+            self.input_offset = state["input_offset"]
+            self.records = state["records"]
+            with self.path.open("ab") as f:
+                f.truncate(state["output_size"])
+            self._file = self.path.open("a", encoding="utf-8", newline="")
+        else:
+            self._file = self.path.open("w", encoding="utf-8", newline="")
+
+        self._csv_writer = None
+        if self.output_format == "csv":
+            self._csv_writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS)
+            if self._file.tell() == 0:
+                self._csv_writer.writeheader()
+
+    def write_rows(self, rows: Sequence[Dict], input_offset: int):
+        if self._csv_writer is not None:
+            self._csv_writer.writerows(rows)
+        else:
+            for row in rows:
+                self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.input_offset = input_offset
+        self.records += len(rows)
+        self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        state = {
+            "input_offset": self.input_offset,
+            "records": self.records,
+            "output_size": self._file.tell(),
+        }
+        tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def close(self):
+        self._file.close()
+
+
+def run_stream(
+    classifier,
+    records: Iterator[Tuple[int, str]],
+    writer: StreamingResultWriter,
+    batch_size: int = 256,
+    workers: int = 1,
+) -> Counter:
+    """Classify records in bounded micro-batches, appending results as they finish.
+
+    With ``workers > 1`` one pool is kept for the whole run and at most
+    ``workers`` micro-batches are in flight at a time, so memory stays flat
+    regardless of the input size. Returns label counts for this run.
+    """
+    global _worker_classifier
+    tier_counts: Counter = Counter()
+    window = max(1, workers)
+    pool = None
+    if workers > 1:
+        _worker_classifier = classifier
+        pool = multiprocessing.Pool(workers, initializer=_init_worker)
+
+    try:
+        while True:
+            batches = []
+            for _ in range(window):
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                batches.append(batch)
+            if not batches:
+                break
+
+            texts = [[text for _, text in batch] for batch in batches]
+            if pool is not None:
+                batch_results = pool.map(_predict_chunk, texts)
+            else:
+                batch_results = [classifier.predict_batch(chunk) for chunk in texts]
+
+            rows = []
+            idx = writer.records
+            for chunk, results in zip(texts, batch_results):
+                for text, result in zip(chunk, results):
+                    idx += 1
+                    rows.append(result_row(idx, text, result))
+                    tier_counts[result["label"]] += 1
+            writer.write_rows(rows, input_offset=batches[-1][-1][0])
+            print(f"Processed {writer.records} records (input offset {writer.input_offset})")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+            _worker_classifier = None
+
+    return tier_counts
+
+
 def summarize(df: pd.DataFrame):
     print("=" * 80)
     print("SUMMARY TABLE")
@@ -408,8 +1225,10 @@ def summarize(df: pd.DataFrame):
     print(df.to_string(index=False))
     print()
 
-    total = len(df)
-    tier_counts = df["Label"].value_counts().to_dict()
+    print_statistics(len(df), df["Label"].value_counts().to_dict())
+
+
+def print_statistics(total: int, tier_counts: Dict[str, int]):
     print("=" * 80)
     print("STATISTICS")
     print("=" * 80)
@@ -426,21 +1245,105 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     parser.add_argument("--input-file", help="Path to a text file (one sentence per line)")
     parser.add_argument("--text", help="Single sentence to classify")
     parser.add_argument("--save-json", help="Optional path to export JSON results")
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes (default: 1, no pool)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=None, help="Sentences per worker task (default: automatic)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="Entries in the LRU result cache for repeated texts (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Stream results to this .jsonl or .csv file instead of printing a summary table",
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=["auto", "text", "csv", "jsonl"],
+        default="auto",
+        help="Input file format for --output streaming (default: from the file extension)",
+    )
+    parser.add_argument("--text-field", default="text", help="CSV column / JSONL key holding the text")
+    parser.add_argument("--batch-size", type=int, default=256, help="Micro-batch size for --output streaming")
+    parser.add_argument("--resume", action="store_true", help="Resume --output streaming from its checkpoint")
+    parser.add_argument("--start-offset", type=int, default=0, help="Byte offset to start reading the input at")
+    parser.add_argument(
+        "--fast-start",
+        action="store_true",
+        help="Minimal startup: no banner, vocabulary lemmas computed on first use if not cached",
+    )
+    parser.add_argument("--profile-startup", action="store_true", help="Print the time spent in each startup phase")
+    parser.add_argument(
+        "--stage-metrics", action="store_true", help="Print calls, time and short-circuits per cascade stage"
+    )
+    parser.add_argument("--metrics-file", help="Write cascade stage metrics in Prometheus text format to this file")
+    args = parser.parse_args(argv)
+    if args.output and not args.input_file:
+        parser.error("--output requires --input-file")
+    return args
+
+
+def main_stream(classifier, args: argparse.Namespace):
+    input_path = Path(args.input_file)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    writer = StreamingResultWriter(Path(args.output), resume=args.resume)
+    start_offset = max(writer.input_offset, args.start_offset)
+    if start_offset:
+        print(f"Resuming at input offset {start_offset} ({writer.records} records already written)")
+    try:
+        records = iter_records(input_path, args.input_format, args.text_field, start_offset)
+        tier_counts = run_stream(classifier, records, writer, batch_size=args.batch_size, workers=args.workers)
+    finally:
+        writer.close()
+
+    print_statistics(sum(tier_counts.values()), tier_counts)
+    print(f"\n✓ Results streamed to {writer.path}")
 
 
 def main(argv: Sequence[str]):
-    ensure_nltk_resources()
     args = parse_args(argv)
-    classifier, metadata = load_hybrid_classifier()
-    sentences = iter_inputs(args)
-    df = run_batch(classifier, sentences)
-    summarize(df)
-
-    if args.save_json:
-        out_path = Path(args.save_json)
-        out_path.write_text(df.to_json(orient="records", force_ascii=False, indent=2), encoding="utf-8")
-        print(f"\n✓ Results exported to {out_path}")
+    profile = StartupProfile() if args.profile_startup else None
+    phase = profile.phase if profile is not None else _no_profile
+    with phase("nltk check"):
+        ensure_nltk_resources()
+    classifier, metadata = load_hybrid_classifier(
+        verbose=not args.fast_start,
+        cache_size=args.cache_size,
+        profile=profile,
+        prewarm_lemmas=not args.fast_start,
+    )
+    if profile is not None:
+        profile.report()
+    if args.stage_metrics or args.metrics_file:
+        classifier.metrics = CascadeMetrics()
+
+    if args.output:
+        main_stream(classifier, args)
+    else:
+        sentences = iter_inputs(args)
+        df = run_batch(classifier, sentences, workers=args.workers, chunk_size=args.chunk_size)
+        summarize(df)
+
+        if args.save_json:
+            out_path = Path(args.save_json)
+            out_path.write_text(df.to_json(orient="records", force_ascii=False, indent=2), encoding="utf-8")
+            print(f"\n✓ Results exported to {out_path}")
+
+    if classifier.metrics is not None:
+        if args.workers > 1:
+            print("\nNote: stage metrics only cover texts classified in this process, not in --workers pools")
+        if args.stage_metrics:
+            print("\nSTAGE METRICS")
+            print(classifier.metrics.format_table())
+        if args.metrics_file:
+            Path(args.metrics_file).write_text(classifier.metrics.to_prometheus(), encoding="utf-8")
+            print(f"\n✓ Prometheus metrics written to {args.metrics_file}")
 
 
 if __name__ == "__main__":
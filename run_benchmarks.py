@@ -0,0 +1,307 @@
+"""Reproducible throughput/latency benchmarks for the detector and classifier.
+
+Every benchmark runs over seeded corpora built from labeled_clean.csv plus
+synthetic text, so two runs on different commits see exactly the same input.
+Results (throughput, p50/p99 latency, peak traced memory) are written as JSON;
+``--compare`` diffs them against an earlier run and exits non-zero when a
+benchmark got slower than ``--threshold``.
+
+Usage examples:
+    python run_benchmarks.py --output bench/base.json
+    python run_benchmarks.py --output bench/new.json --compare bench/base.json
+    python run_benchmarks.py --only detect,spam --size 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gc
+import json
+import math
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+CORPUS_PATH = PROJECT_ROOT / "labeled_clean.csv"
+BENCHMARK_FORMAT_VERSION = 1
+
+# Character substitutions used to build the obfuscated corpus
+OBFUSCATIONS = {"a": "@4", "e": "3", "i": "1!", "o": "0", "s": "$5", "t": "7", "l": "1|"}
+FILLER_WORDS = (
+    "the a to and of you i it is that in this for my on just so be have not with me what "
+    "are your like do get all if was but no can out up when time people know lol really"
+).split()
+
+
+def load_tweets(path: Path = CORPUS_PATH) -> List[str]:
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        return [row["tweet"] for row in reader if row.get("tweet")]
+
+
+def obfuscate(text: str, rng: random.Random, rate: float = 0.5) -> str:
+    """Replace a share of substitutable letters with leetspeak characters."""
+    chars = []
+    for char in text:
+        options = OBFUSCATIONS.get(char.lower())
+        chars.append(rng.choice(options) if options and rng.random() < rate else char)
+    return "".join(chars)
+
+
+def synthetic_text(rng: random.Random, phrases: Sequence[str], words: int) -> str:
+    """Filler words with a dictionary phrase mixed in about every 8 words."""
+    tokens = []
+    for _ in range(words):
+        tokens.append(rng.choice(phrases) if phrases and rng.random() < 0.125 else rng.choice(FILLER_WORDS))
+    return " ".join(tokens)
+
+
+def build_corpora(size: int, seed: int, phrases: Sequence[str]) -> Dict[str, List[str]]:
+    """Seeded corpora of ``size`` texts each, by length and obfuscation."""
+    rng = random.Random(seed)
+    tweets = load_tweets() if CORPUS_PATH.exists() else []
+    short = [text for text in tweets if len(text) < 60]
+    long = [text for text in tweets if len(text) >= 100]
+
+    def sample(pool: Sequence[str]) -> List[str]:
+        return [rng.choice(pool) for _ in range(size)] if pool else []
+
+    corpora = {
+        "tweets_short": sample(short),
+        "tweets_long": sample(long),
+        "tweets_obfuscated": [obfuscate(text, rng) for text in sample(tweets)],
+        "synthetic_20w": [synthetic_text(rng, phrases, 20) for _ in range(size)],
+        "synthetic_200w": [synthetic_text(rng, phrases, 200) for _ in range(max(1, size // 4))],
+    }
+    return {name: texts for name, texts in corpora.items() if texts}
+
+
+def obfuscated_words(corpora: Dict[str, List[str]], size: int, seed: int) -> List[str]:
+    """Single obfuscated words, cleaned the way detect() passes them to the obfuscation index."""
+    rng = random.Random(seed + 1)
+    words = [
+        re.sub(r"[^\w@$!]", "", word) for text in corpora.get("tweets_obfuscated", []) for word in text.lower().split()
+    ]
+    words = [word for word in words if any(char in word for char in "0134578@$!|")]
+    return [rng.choice(words) for _ in range(size)] if words else []
+
+
+def percentile(ordered: Sequence[float], point: float) -> float:
+    rank = max(1, math.ceil(point / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(func: Callable, items: Sequence, repeats: int = 3, warmup: int = 20) -> Dict[str, float]:
+    """Per-call latencies of ``func(item)`` over ``repeats`` passes, plus peak memory.
+
+    Throughput comes from the fastest pass, which is the least disturbed by
+    other load on the machine; latency percentiles use every call.
+    """
+    for item in items[:warmup]:
+        func(item)
+
+    latencies = []
+    total = 0.0
+    best = math.inf
+    clock = time.perf_counter
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = clock()
+            for item in items:
+                call_started = clock()
+                func(item)
+                latencies.append(clock() - call_started)
+            elapsed = clock() - started
+            total += elapsed
+            best = min(best, elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Separate pass: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        for item in items:
+            func(item)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    calls = len(items) * repeats
+    return {
+        "calls": calls,
+        "throughput_per_s": round(len(items) / best, 1) if best else 0.0,
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+        "mean_us": round(total / calls * 1e6, 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def load_components(verbose: bool = False):
+    """Detector, classifier and preprocessing, whichever can be loaded here."""
+    import run_batch_toxicity_tests as runner
+
+    components = {"runner": runner, "detector": None, "token_detector": None, "classifier": None, "preprocess": False}
+    if runner.SLANG_PATH.exists():
+        components["detector"] = runner.ToxicPhraseDetector(runner.SLANG_PATH, verbose=verbose)
+        components["token_detector"] = runner.ToxicPhraseDetector(
+            runner.SLANG_PATH, verbose=verbose, match_mode="tokens"
+        )
+    try:
+        runner.ensure_nltk_resources()
+        components["preprocess"] = True
+    except (LookupError, OSError, SystemExit) as exc:
+        print(f"Skipping NLTK-dependent preprocessing setup: {str(exc).strip().splitlines()[0]}")
+    try:
+        components["classifier"], _ = runner.load_hybrid_classifier(verbose=verbose)
+    except (OSError, KeyError) as exc:
+        print(f"Skipping full-model benchmarks (saved models unavailable): {exc}")
+    return components
+
+
+def run_suite(args: argparse.Namespace) -> Dict:
+    components = load_components()
+    runner = components["runner"]
+    detector = components["detector"]
+    classifier = components["classifier"]
+    phrases = sorted(detector.toxic_phrases) if detector is not None else []
+    corpora = build_corpora(args.size, args.seed, phrases)
+    words = obfuscated_words(corpora, args.size, args.seed)
+
+    # The spam filter does not need the model artifacts
+    spam_filter = classifier if classifier is not None else runner.HybridToxicClassifier(None, None)
+
+    benchmarks: Dict[str, tuple] = {
+        "clean_text": (runner.clean_text, corpora),
+        "spam": (spam_filter._detect_spam, corpora),
+    }
+    if components["preprocess"]:
+        benchmarks["preprocess"] = (lambda text: runner.preprocess_text(runner.clean_text(text)), corpora)
+    if detector is not None:
+        benchmarks["detect"] = (detector.detect, corpora)
+        benchmarks["detect_tokens"] = (components["token_detector"].detect, corpora)
+        # The path detect() takes for every word that is not a direct match
+        benchmarks["obfuscation_lookup"] = (detector._match_obfuscated_word, {"obfuscated_words": words})
+    if classifier is not None:
+        benchmarks["predict"] = (classifier.predict, corpora)
+
+    selected = set(args.only.split(",")) if args.only else None
+    results: Dict[str, Dict] = {}
+    for name, (func, inputs) in benchmarks.items():
+        if selected is not None and name not in selected:
+            continue
+        results[name] = {}
+        for corpus_name, items in inputs.items():
+            if not items:
+                continue
+            stats = measure(func, items, repeats=args.repeats)
+            results[name][corpus_name] = stats
+            print(
+                f"{name:<20} {corpus_name:<18} {stats['throughput_per_s']:>12.1f}/s "
+                f"p50 {stats['p50_us']:>9.1f}us  p99 {stats['p99_us']:>9.1f}us  "
+                f"peak {stats['peak_memory_kb']:>8.1f}KB"
+            )
+
+    return {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "size": args.size,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print per-benchmark changes against ``baseline``; return the regressions."""
+    regressions = []
+    print(f"\nComparison with {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0f}%)")
+    for name, corpora in current["results"].items():
+        for corpus_name, stats in corpora.items():
+            old = baseline.get("results", {}).get(name, {}).get(corpus_name)
+            if not old:
+                continue
+            # Throughput down or median latency up by more than the threshold is
+            # a regression; p99 is too noisy on shared machines to gate on
+            throughput_change = (stats["throughput_per_s"] / old["throughput_per_s"] - 1) * 100
+            p50_change = (stats["p50_us"] / old["p50_us"] - 1) * 100 if old["p50_us"] else 0.0
+            p99_change = (stats["p99_us"] / old["p99_us"] - 1) * 100 if old["p99_us"] else 0.0
+            flag = ""
+            if throughput_change < -threshold or p50_change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}/{corpus_name}")
+            print(
+                f"{name:<20} {corpus_name:<18} throughput {throughput_change:+7.1f}%  "
+                f"p50 {p50_change:+7.1f}%  p99 {p99_change:+7.1f}%{flag}"
+            )
+    return regressions
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Detector and classifier benchmarks")
+    parser.add_argument("--size", type=int, default=500, help="Texts per corpus (default: 500)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over each corpus (default: 5)")
+    parser.add_argument("--seed", type=int, default=13, help="Corpus seed; keep it fixed to compare runs")
+    parser.add_argument("--only", help="Comma-separated benchmark names (clean_text,spam,preprocess,detect,...)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent slowdown reported as a regression (default: 10; raise it on noisy shared machines)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]):
+    args = parse_args(argv)
+    report = run_suite(args)
+
+    if args.output:
+        out_path = Path(args.output)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n✓ Results written to {out_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if (baseline.get("meta", {}).get("seed"), baseline.get("meta", {}).get("size")) != (args.seed, args.size):
+            print("Warning: baseline used a different --seed/--size; corpora differ")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,223 @@
+"""Fast text normalization and preprocessing shared by the toxicity classifiers.
+
+``clean_text`` strips URLs, mentions, hashtags, HTML entities and anything
+that is not a letter, with every pattern compiled at import and the removal
+passes fused into one. ``clean_texts`` does the same for a whole list or
+pandas Series at once.
+
+``preprocess_text`` in the classifier scripts tokenizes with NLTK's
+``word_tokenize`` and lemmatizes token by token. Its input is always the
+output of ``clean_text``, which only keeps lowercase letters and single
+spaces, so most of that machinery never has anything to do.
+``FastPreprocessor`` reproduces the same output with a whitespace split and
+a lemma lookup table.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Patterns of the original clean_text passes, in order
+URL_RE = re.compile(r"http\S+|www\S+|https\S+")
+MENTION_HASHTAG_RE = re.compile(r"@\w+|#\w+")
+HTML_ENTITY_RE = re.compile(r"&\w+;|&#\d+;")
+# Single pass over the three removals above. "&#\d+;" is left out because the
+# hashtag pass always removes its "#\d+" first.
+REMOVAL_RE = re.compile(r"http\S+|www\S+|@\w+|#\w+|&\w+;")
+# Where the fused pass can differ from running the passes one after another:
+# a URL starting inside a mention/hashtag/entity word, or a mention/hashtag
+# whose removal joins an entity back together ("&amp@x;" -> "&amp;").
+REMOVAL_CONFLICT_RE = re.compile(r"[@#&]\w*(?:http|www)|&\w+[@#]")
+# Non-letters become spaces and whitespace runs collapse: one pass does both.
+# Runs that are already a single space are left alone.
+NON_LETTER_RUN_RE = re.compile(r"[^a-zA-Z ][^a-zA-Z]*| [^a-zA-Z]+")
+
+# Record separator for batch cleaning: whitespace to every pattern above, so
+# no match can cross from one text into the next
+_BATCH_SEPARATOR = "\x1e"
+_BATCH_NON_LETTER_RUN_RE = re.compile(r"[^a-zA-Z\x1e ][^a-zA-Z\x1e]*| [^a-zA-Z\x1e]+")
+_BATCH_CHUNK_SIZE = 1024
+
+_REPEATED_CHAR_RES: Dict[Tuple[int, bool], re.Pattern] = {}
+
+
+def _repeated_char_re(max_repeats: int, lowercase: bool = False) -> re.Pattern:
+    # Lowercased text has no A-Z left, and the narrower class scans faster
+    key = (max_repeats, lowercase)
+    pattern = _REPEATED_CHAR_RES.get(key)
+    if pattern is None:
+        letters = "a-z" if lowercase else "a-zA-Z"
+        pattern = re.compile(rf"([{letters}])\1{{{max_repeats},}}")
+        _REPEATED_CHAR_RES[key] = pattern
+    return pattern
+
+
+def normalize_repeated_chars(text: str, max_repeats: int = 2) -> str:
+    """Cap runs of the same letter at ``max_repeats`` ("sooooo" -> "soo")."""
+    return _repeated_char_re(max_repeats).sub(r"\1" * max_repeats, text)
+
+
+def _normalize_repeated_lower(text: str, max_repeats: int) -> str:
+    return _repeated_char_re(max_repeats, lowercase=True).sub(r"\1" * max_repeats, text)
+
+
+def _remove_markup(text: str) -> str:
+    if REMOVAL_CONFLICT_RE.search(text):
+        text = URL_RE.sub("", text)
+        text = MENTION_HASHTAG_RE.sub("", text)
+        return HTML_ENTITY_RE.sub("", text)
+    return REMOVAL_RE.sub("", text)
+
+
+def clean_text(text, max_repeats: int | None = 2) -> str:
+    """Lowercase, drop URLs/mentions/hashtags/HTML entities, keep only letters.
+
+    Args:
+        text: Raw text (non-strings are converted with ``str``)
+        max_repeats: Cap for repeated letters, or None to keep them as is
+    """
+    text = str(text).lower()
+    if max_repeats is not None:
+        text = _normalize_repeated_lower(text, max_repeats)
+    text = _remove_markup(text)
+    return NON_LETTER_RUN_RE.sub(" ", text).strip()
+
+
+def _clean_chunk(values: List[str], max_repeats: int | None) -> List[str]:
+    joined = _BATCH_SEPARATOR.join(values).lower()
+    if joined.count(_BATCH_SEPARATOR) != len(values) - 1:
+        return [clean_text(value, max_repeats) for value in values]
+    if max_repeats is not None:
+        joined = _normalize_repeated_lower(joined, max_repeats)
+    if REMOVAL_CONFLICT_RE.search(joined):
+        joined = _BATCH_SEPARATOR.join(_remove_markup(value) for value in joined.split(_BATCH_SEPARATOR))
+    else:
+        joined = REMOVAL_RE.sub("", joined)
+    joined = _BATCH_NON_LETTER_RUN_RE.sub(" ", joined)
+    return [value.strip() for value in joined.split(_BATCH_SEPARATOR)]
+
+
+def clean_texts(texts, max_repeats: int | None = 2):
+    """``clean_text`` over a list or pandas Series, one regex pass per chunk.
+
+    Texts are joined with a separator and every pass runs over the joined
+    string, instead of six passes and intermediate copies per text.
+
+    Returns:
+        A Series with the same index for Series input, else a list
+    """
+    values = [str(text) for text in texts]
+    cleaned: List[str] = []
+    for start in range(0, len(values), _BATCH_CHUNK_SIZE):
+        cleaned.extend(_clean_chunk(values[start:start + _BATCH_CHUNK_SIZE], max_repeats))
+    # pandas is only imported by callers that already use it
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(texts, pd.Series):
+        return pd.Series(cleaned, index=texts.index, name=texts.name, dtype=object)
+    return cleaned
+
+
+# Text that clean_text can produce: lowercase ASCII letters and single spaces
+CLEAN_TEXT_RE = re.compile(r"[a-z ]*")
+
+# Word-level splits NLTK's Treebank tokenizer applies even without punctuation
+# (its CONTRACTIONS2 rules); everything else in clean text is split on spaces.
+TREEBANK_SPLITS: Dict[str, Tuple[str, str]] = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+
+
+def tokenize_clean_text(text: str) -> List[str]:
+    """Tokenize clean_text output exactly like ``nltk.word_tokenize``."""
+    tokens = []
+    for token in text.split():
+        split = TREEBANK_SPLITS.get(token)
+        if split is None:
+            tokens.append(token)
+        else:
+            tokens.extend(split)
+    return tokens
+
+
+def vocabulary_words(vocabulary: Iterable[str]) -> List[str]:
+    """Unique single words appearing in a (possibly n-gram) vectorizer vocabulary."""
+    words = set()
+    for term in vocabulary:
+        words.update(term.split())
+    return sorted(words)
+
+
+class FastPreprocessor:
+    """Stopword removal and lemmatization with precomputed lemmas.
+
+    Lemmas for the vectorizer vocabulary are computed once up front; other
+    words go through a bounded memo around the real lemmatizer, so the output
+    is always the same as calling the lemmatizer directly.
+
+    Args:
+        lemmatize: Function mapping a word to its lemma
+            (e.g. ``WordNetLemmatizer().lemmatize``)
+        stop_words: Words to drop
+        vocabulary: Optional vectorizer vocabulary used to prefill the lemma table
+        memo_size: Maximum number of memoized lemmas for words outside the table
+        fallback_tokenize: Tokenizer used for text that is not clean_text output
+    """
+
+    def __init__(
+        self,
+        lemmatize: Callable[[str], str],
+        stop_words: Iterable[str],
+        vocabulary: Iterable[str] = (),
+        memo_size: int = 100_000,
+        fallback_tokenize: Callable[[str], List[str]] | None = None,
+    ):
+        self.lemmatize = lemmatize
+        self.stop_words = frozenset(stop_words)
+        self.fallback_tokenize = fallback_tokenize
+        self.lemma_table: Dict[str, str] = {}
+        self._memo = lru_cache(maxsize=memo_size)(lemmatize)
+        self.add_vocabulary(vocabulary)
+
+    def add_vocabulary(self, vocabulary: Iterable[str], known: Dict[str, str] | None = None):
+        """Precompute lemmas for every word of a vectorizer vocabulary.
+
+        Args:
+            vocabulary: Vectorizer vocabulary terms
+            known: Previously computed lemmas to reuse instead of calling the lemmatizer
+        """
+        known = known or {}
+        for word in vocabulary_words(vocabulary):
+            if len(word) > 2 and word not in self.stop_words and word not in self.lemma_table:
+                lemma = known.get(word)
+                self.lemma_table[word] = lemma if lemma is not None else self.lemmatize(word)
+
+    def tokenize(self, text: str) -> List[str]:
+        if CLEAN_TEXT_RE.fullmatch(text) or self.fallback_tokenize is None:
+            return tokenize_clean_text(text)
+        return self.fallback_tokenize(text)
+
+    def __call__(self, text: str) -> str:
+        table = self.lemma_table
+        memo = self._memo
+        stop_words = self.stop_words
+        lemmas = []
+        for word in self.tokenize(text):
+            if word in stop_words or len(word) <= 2:
+                continue
+            lemma = table.get(word)
+            lemmas.append(lemma if lemma is not None else memo(word))
+        return " ".join(lemmas)
+
+    def batch(self, texts: Sequence[str]) -> List[str]:
+        return [self(text) for text in texts]
+
+    def memo_info(self):
+        return self._memo.cache_info()
@@ -1,12 +1,23 @@
 # hybrid_classifier.py
 
-import re
+import sys
+from pathlib import Path
+
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 
 
+# text_preprocessing.py lives in the project root, while the unused/ scripts
+# that import this file only have unused/ on sys.path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+# Shared precompiled normalization and the fast tokenize + lemmatize path
+from text_preprocessing import FastPreprocessor, clean_text as _fast_clean_text
+
 lemmatizer = WordNetLemmatizer()
 stop_words = set(stopwords.words('english'))
 
@@ -15,43 +26,23 @@ def clean_text(text):
     """
     Clean and preprocess text data
     """
-    # Convert to string and lowercase
-    text = str(text).lower()
-    
-    # Remove URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    
-    # Remove user mentions and hashtags
-    text = re.sub(r'@\w+|#\w+', '', text)
-    
-    # Remove HTML entities
-    text = re.sub(r'&\w+;|&#\d+;', '', text)
-    
-    # Remove special characters and numbers (keep only letters and spaces)
-    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-    
-    # Remove extra whitespaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    # Shared precompiled normalization (no repeated-letter capping here)
+    return _fast_clean_text(text, max_repeats=None)
 
 # Advanced preprocessing with lemmatization
 lemmatizer = WordNetLemmatizer()
 stop_words = set(stopwords.words('english'))
 
+# Whitespace tokenization + memoized lemmas; word_tokenize only for text
+# that is not clean_text output
+fast_preprocessor = FastPreprocessor(lemmatizer.lemmatize, stop_words, fallback_tokenize=word_tokenize)
+
 def preprocess_text(text):
     """
     Advanced preprocessing: tokenization, stopword removal, lemmatization
     """
     try:
-        # Tokenize
-        tokens = word_tokenize(text)
-        
-        # Remove stopwords and lemmatize
-        tokens = [lemmatizer.lemmatize(word) for word in tokens 
-                  if word not in stop_words and len(word) > 2]
-        
-        return ' '.join(tokens)
+        return fast_preprocessor(text)
     except:
         return text
 
@@ -0,0 +1,90 @@
+"""Multilabel toxicity engine: one shared TF-IDF vectorizer, stacked label heads.
+
+The V4 multilabel model is six ``Pipeline(TfidfVectorizer, LogisticRegression)``
+objects, so every prediction runs six TF-IDF transforms of the same text.
+``MultilabelEngine`` keeps a single vectorizer and the six logistic
+regression heads as one ``(n_labels, n_features)`` coefficient matrix: all
+label probabilities come from one sparse matmul plus a sigmoid.
+
+Each head still has its own (undersampled) training rows; only the feature
+space is shared.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy.special import expit
+
+LABEL_COLS = ('toxic', 'severe_toxic', 'obscene', 'threat', 'insult', 'identity_hate')
+
+
+def compact_vectorizer(vectorizer):
+    """
+    Drop fitted state a TfidfVectorizer does not need for transform().
+
+    The terms max_features dropped (``stop_words_``) are only kept for
+    inspection and are most of a pickled vectorizer; ``_stop_words_id`` is an
+    ``id()`` from the training process. Both made two trainings of the same
+    model pickle to different bytes.
+    """
+    if hasattr(vectorizer, 'stop_words_'):
+        vectorizer.stop_words_ = None
+    if hasattr(vectorizer, '_stop_words_id'):
+        del vectorizer._stop_words_id
+    return vectorizer
+
+
+class MultilabelEngine:
+    """
+    Shared vectorizer + stacked binary logistic regression heads.
+
+    Args:
+        vectorizer: Fitted TfidfVectorizer shared by every label
+        coef: Coefficient matrix, one row per label
+        intercept: Intercept per label
+        labels: Label names, in row order
+    """
+
+    def __init__(self, vectorizer, coef, intercept, labels: Sequence[str] = LABEL_COLS):
+        self.vectorizer = vectorizer
+        self.labels = tuple(labels)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        if self.coef.shape[0] != len(self.labels) or self.intercept.shape != (len(self.labels),):
+            raise ValueError("coef and intercept need one row/value per label")
+
+    @classmethod
+    def from_heads(cls, vectorizer, heads: Dict[str, object]) -> 'MultilabelEngine':
+        """
+        Stack fitted binary LogisticRegression heads trained on `vectorizer` features.
+
+        Args:
+            vectorizer: The fitted vectorizer every head was trained on
+            heads: Mapping label -> fitted LogisticRegression (classes 0/1)
+        """
+        for label, head in heads.items():
+            if list(head.classes_) != [0, 1]:
+                raise ValueError(f"Head for '{label}' is not a binary 0/1 classifier")
+        compact_vectorizer(vectorizer)
+        coef = np.vstack([np.asarray(head.coef_, dtype=np.float64).ravel() for head in heads.values()])
+        intercept = np.array([float(np.ravel(head.intercept_)[0]) for head in heads.values()])
+        return cls(vectorizer, coef, intercept, labels=list(heads))
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        """Log-odds of every label, shape (len(texts), n_labels)."""
+        features = self.vectorizer.transform(texts)
+        return np.asarray(features @ self.coef.T) + self.intercept
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Positive-class probability of every label, shape (len(texts), n_labels)."""
+        return expit(self.decision_function(texts))
+
+    def predict(self, text: str) -> Dict[str, float]:
+        """Label -> probability for a single (preprocessed) text."""
+        return dict(zip(self.labels, self.predict_proba([text])[0].tolist()))
+
+    def predict_many(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        """Label -> probability for each (preprocessed) text."""
+        return [dict(zip(self.labels, row)) for row in self.predict_proba(texts).tolist()]
@@ -5,6 +5,7 @@ from pathlib import Path
 
 # Cần import các hàm tiền xử lý và lớp giả để joblib có thể tải mô hình thành công
 from hybrid_classifier import clean_text, preprocess_text
+from multilabel_engine import MultilabelEngine
 try:
     from CrawlData.model import ToxicPhraseDetector
 except ImportError:
@@ -33,6 +34,20 @@ def load_model(model_filename: str = 'multilabel_classifiers.pkl'):
         return None
 
 
+def predict_label_probabilities(model, processed_text: str) -> dict:
+    """
+    Xác suất của từng nhãn cho một văn bản đã tiền xử lý.
+    MultilabelEngine (V5) tính cả 6 nhãn bằng một phép nhân ma trận;
+    mô hình cũ (dict các Pipeline, V4) vẫn chạy từng pipeline một.
+    """
+    if isinstance(model, MultilabelEngine):
+        return model.predict(processed_text)
+    return {
+        label: pipeline.predict_proba([processed_text])[0, 1]
+        for label, pipeline in model.items()
+    }
+
+
 def get_final_classification(results: dict):
     """
     Từ điển các xác suất đầu vào, đưa ra một kết luận cuối cùng về mức độ độc hại.
@@ -86,7 +101,7 @@ def run_interactive_multilabel_prediction():
     classifiers = load_model()
 
     # Chỉ tiếp tục nếu mô hình được tải thành công
-    if not classifiers:
+    if classifiers is None:
         return
 
     print("\n" + "="*60)
@@ -110,12 +125,8 @@ def run_interactive_multilabel_prediction():
         # Tiền xử lý input của người dùng
         processed_text = preprocess_text(clean_text(text))
 
-        # Thực hiện dự đoán cho từng loại độc hại
-        results = {}
-        for label, pipeline in classifiers.items():
-            # Dự đoán xác suất cho lớp 1 (lớp độc hại)
-            probability = pipeline.predict_proba([processed_text])[0, 1]
-            results[label] = probability
+        # Dự đoán xác suất lớp 1 (lớp độc hại) cho từng loại độc hại
+        results = predict_label_probabilities(classifiers, processed_text)
         
         # Lấy kết luận cuối cùng từ hàm get_final_classification
         final_verdict = get_final_classification(results)
@@ -1,76 +1,66 @@
 # train_multilabel_model_v4.py
 
-import pandas as pd
-import joblib
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 
+# preprocess_cache.py nằm ở thư mục gốc của dự án; chạy
+# `python unused/train_multilabel_model.py` chỉ đưa unused/ vào sys.path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+import hybrid_classifier
 from hybrid_classifier import clean_text, preprocess_text
+from multilabel_engine import LABEL_COLS, MultilabelEngine, compact_vectorizer
+from preprocess_cache import PreprocessCache
+
+PREPROCESS_CACHE_DIR = Path(__file__).parent / '.prepcache'
 
-def train_and_save_multilabel_classifier_v4():
+def train_and_save_multilabel_classifier_v4(workers=1, use_cache=True):
     """
     Huấn luyện và lưu bộ phân loại đa nhãn phiên bản 4 (Undersampling):
     - Không dùng SMOTE hay class_weight.
     - Áp dụng Random Undersampling để tạo tập huấn luyện cân bằng hơn.
     - Sử dụng Logistic Regression.
+    - workers > 1: tiền xử lý và huấn luyện 6 nhãn song song (kết quả giống hệt chạy tuần tự).
     """
     # 1. Tải dữ liệu
     print("Đang tải dữ liệu train.csv...")
     data_path = Path(__file__).parent / 'Data' / 'train.csv'
-    df = pd.read_csv(data_path).dropna(subset=['comment_text'])
+    df = pd.read_csv(data_path).dropna(subset=['comment_text']).reset_index(drop=True)
 
     # 2. Tiền xử lý văn bản
     print("Đang tiền xử lý văn bản (bước này có thể mất vài phút)...")
-    df['processed_comment'] = df['comment_text'].apply(lambda x: preprocess_text(clean_text(x)))
-    
-    label_cols = ['toxic', 'severe_toxic', 'obscene', 'threat', 'insult', 'identity_hate']
-    
+    df['processed_comment'] = preprocess_corpus(df['comment_text'], workers=workers, use_cache=use_cache)
+
     # 3. Huấn luyện một mô hình cho mỗi nhãn bằng phương pháp Undersampling
-    classifiers = {}
     print("Bắt đầu huấn luyện 6 mô hình riêng biệt (phiên bản V4 - Undersampling)...")
 
-    for i, label in enumerate(label_cols):
-        print(f"\n  ({i+1}/6) Đang huấn luyện cho nhãn: '{label}'...")
-        
-        # Tách dữ liệu thành 2 lớp: positive (1) và negative (0)
-        df_positive = df[df[label] == 1]
-        df_negative = df[df[label] == 0]
-        
-        # Tính toán số lượng mẫu negative cần lấy
-        # Chúng ta sẽ lấy số mẫu negative nhiều gấp 5 lần số mẫu positive
-        # Điều này giúp giữ lại nhiều thông tin của lớp đa số hơn là cân bằng 1:1
-        # Bạn có thể thay đổi tỷ lệ này (ví dụ: 3, 5, 10)
-        negative_sample_size = min(len(df_negative), len(df_positive) * 5)
-        
-        print(f"    - Số mẫu Positive (1): {len(df_positive)}")
-        print(f"    - Số mẫu Negative (0) sẽ được lấy: {negative_sample_size} (từ {len(df_negative)} mẫu)")
-
-        # Lấy mẫu ngẫu nhiên từ lớp negative
-        df_negative_sampled = df_negative.sample(n=negative_sample_size, random_state=42)
-        
-        # Kết hợp lại để tạo thành tập dữ liệu huấn luyện mới cho nhãn này
-        df_train_balanced = pd.concat([df_positive, df_negative_sampled])
-        
-        # Xáo trộn dữ liệu
-        df_train_balanced = df_train_balanced.sample(frac=1, random_state=42).reset_index(drop=True)
-        
-        print(f"    - Tổng số mẫu huấn luyện cho nhãn '{label}': {len(df_train_balanced)}")
-
-        X_train = df_train_balanced['processed_comment']
-        y_train = df_train_balanced[label]
-        
-        # Tạo pipeline huấn luyện
-        pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, ngram_range=(1, 2))),
-            ('clf', LogisticRegression(solver='liblinear', random_state=42)) # Không dùng class_weight
-        ])
-        
-        # Huấn luyện pipeline trên tập dữ liệu đã được undersample
-        pipeline.fit(X_train, y_train)
-        classifiers[label] = pipeline
+    # Lấy mẫu ở tiến trình chính (seed cố định), worker chỉ nhận vị trí các dòng.
+    # Mỗi nhãn lấy toàn bộ mẫu positive và số mẫu negative nhiều gấp 5 lần,
+    # giữ lại nhiều thông tin của lớp đa số hơn là cân bằng 1:1
+    label_rows = {}
+    for i, label in enumerate(LABEL_COLS):
+        label_rows[label] = undersampled_rows(df, label)
+        print(f"  ({i+1}/6) Nhãn '{label}': {int(df[label].sum())} mẫu positive, "
+              f"{len(label_rows[label])} mẫu huấn luyện")
+
+    texts, offsets = encode_texts(df['processed_comment'])
+    arrays = {'texts': texts, 'offsets': offsets, 'targets': df[list(LABEL_COLS)].to_numpy()}
+    classifiers = train_label_heads(_fit_pipeline_head, arrays, label_rows, workers=workers)
 
     # 4. Lưu bộ phân loại
     print("\nĐã huấn luyện xong. Đang lưu mô hình V4...")
@@ -79,5 +69,187 @@ def train_and_save_multilabel_classifier_v4():
     joblib.dump(classifiers, save_dir / 'multilabel_classifiers.pkl')
     print(f"✓ Bộ phân loại đa nhãn V4 đã được lưu vào: {save_dir / 'multilabel_classifiers.pkl'}")
 
+def undersampled_rows(df, label, negative_ratio=5, random_state=42):
+    """
+    Vị trí (positional) các dòng huấn luyện của một nhãn, giống hệt cách lấy mẫu V4:
+    toàn bộ mẫu positive + tối đa negative_ratio lần số mẫu negative, rồi xáo trộn.
+    """
+    df_positive = df[df[label] == 1]
+    df_negative = df[df[label] == 0]
+    negative_sample_size = min(len(df_negative), len(df_positive) * negative_ratio)
+    df_negative_sampled = df_negative.sample(n=negative_sample_size, random_state=random_state)
+    df_train_balanced = pd.concat([df_positive, df_negative_sampled])
+    df_train_balanced = df_train_balanced.sample(frac=1, random_state=random_state)
+    return df.index.get_indexer(df_train_balanced.index)
+
+
+# --- Huấn luyện song song ---------------------------------------------------
+# Dữ liệu lớn (văn bản đã tiền xử lý, ma trận TF-IDF, nhãn) được ghi một lần
+# thành file .npy và mỗi worker mở bằng memory-map, nên các tiến trình dùng
+# chung page cache thay vì mỗi worker nhận một bản sao qua pickle. Mỗi worker
+# chỉ nhận tên nhãn và vị trí các dòng đã lấy mẫu sẵn ở tiến trình chính.
+
+_SHARED = {}
+
+
+def preprocess_row(text):
+    return preprocess_text(clean_text(text))
+
+
+def _preprocess_chunk(texts):
+    return [preprocess_row(x) for x in texts]
+
+
+def preprocess_corpus(texts, workers=1, chunk_size=2000, use_cache=True):
+    """
+    Tiền xử lý toàn bộ văn bản, chia thành từng khối cho process pool (giữ nguyên thứ tự).
+    use_cache: chỉ những dòng mới (hoặc khi code tiền xử lý đổi) mới chạy NLTK.
+    """
+    if use_cache:
+        cache = PreprocessCache(
+            PREPROCESS_CACHE_DIR,
+            preprocess_row,
+            # clean_text/preprocess_text gọi sang các hàm nhanh trong text_preprocessing
+            version_of=(clean_text, preprocess_text, hybrid_classifier._fast_clean_text,
+                        type(hybrid_classifier.fast_preprocessor)),
+            version=f"nltk-{hybrid_classifier.nltk.__version__}",
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+        processed = cache.map(texts)
+        print(f"  Cache tiền xử lý: {cache.hits} dòng có sẵn, {cache.misses} dòng mới được xử lý")
+        return processed
+
+    texts = list(texts)
+    if workers <= 1:
+        return _preprocess_chunk(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [text for chunk in pool.map(_preprocess_chunk, chunks) for text in chunk]
+
+
+def encode_texts(texts):
+    """Gói danh sách văn bản thành một mảng byte UTF-8 + mảng offset (để memory-map)."""
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _shared_texts(rows):
+    texts, offsets = _SHARED['texts'], _SHARED['offsets']
+    return [texts[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8') for i in rows]
+
+
+def _shared_targets(label, rows):
+    return np.asarray(_SHARED['targets'][rows, LABEL_COLS.index(label)])
+
+
+def _attach_shared(shared_dir):
+    """Khởi tạo worker: mở các mảng dùng chung ở chế độ memory-map (chỉ đọc)."""
+    _SHARED.clear()
+    for path in Path(shared_dir).glob('*.npy'):
+        _SHARED[path.stem] = np.load(path, mmap_mode='r')
+
+
+def _fit_pipeline_head(label, rows):
+    """V4: TfidfVectorizer + LogisticRegression riêng cho một nhãn."""
+    pipeline = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=5000, ngram_range=(1, 2))),
+        ('clf', LogisticRegression(solver='liblinear', random_state=42))  # Không dùng class_weight
+    ])
+    pipeline.fit(_shared_texts(rows), _shared_targets(label, rows))
+    # Bỏ trạng thái phụ thuộc tiến trình để file .pkl giống hệt giữa các lần chạy
+    compact_vectorizer(pipeline.named_steps['tfidf'])
+    return pipeline
+
+
+def _fit_linear_head(label, rows):
+    """V5: một đầu LogisticRegression trên ma trận TF-IDF dùng chung."""
+    features = sparse.csr_matrix(
+        (_SHARED['data'], _SHARED['indices'], _SHARED['indptr']), shape=tuple(int(n) for n in _SHARED['shape']), copy=False
+    )
+    head = LogisticRegression(solver='liblinear', random_state=42)
+    head.fit(features[rows], _shared_targets(label, rows))
+    return head
+
+
+def train_label_heads(fit_head, arrays, label_rows, workers=1):
+    """
+    Huấn luyện một mô hình cho mỗi nhãn bằng fit_head(label, rows).
+
+    Việc lấy mẫu đã xong ở tiến trình chính và solver liblinear có random_state
+    cố định, nên kết quả không phụ thuộc vào số worker hay thứ tự hoàn thành.
+    Trả về dict nhãn -> mô hình, theo thứ tự của label_rows.
+    """
+    workers = min(workers, len(label_rows))
+    if workers <= 1:
+        _SHARED.update(arrays)
+        try:
+            # Cùng một vòng pickle như kết quả trả về từ worker, để file .pkl
+            # lưu ra giống hệt từng byte dù chạy tuần tự hay song song
+            return {label: pickle.loads(pickle.dumps(fit_head(label, rows))) for label, rows in label_rows.items()}
+        finally:
+            _SHARED.clear()
+
+    with tempfile.TemporaryDirectory(prefix='multilabel_') as shared_dir:
+        for name, array in arrays.items():
+            np.save(Path(shared_dir) / f'{name}.npy', np.ascontiguousarray(array))
+        print(f"  Huấn luyện song song {len(label_rows)} nhãn trên {workers} tiến trình...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared, initargs=(shared_dir,)) as pool:
+            futures = {label: pool.submit(fit_head, label, rows) for label, rows in label_rows.items()}
+            return {label: future.result() for label, future in futures.items()}
+
+
+def train_and_save_multilabel_engine_v5(workers=1, use_cache=True):
+    """
+    Huấn luyện bộ phân loại đa nhãn V5 (MultilabelEngine):
+    - Một TfidfVectorizer dùng chung, fit một lần trên toàn bộ dữ liệu.
+    - Mỗi nhãn vẫn có tập huấn luyện undersampling riêng như V4.
+    - 6 đầu Logistic Regression được gộp thành một ma trận hệ số.
+    - workers > 1: tiền xử lý và huấn luyện các nhãn song song (kết quả giống hệt chạy tuần tự).
+    """
+    print("Đang tải dữ liệu train.csv...")
+    data_path = Path(__file__).parent / 'Data' / 'train.csv'
+    df = pd.read_csv(data_path).dropna(subset=['comment_text']).reset_index(drop=True)
+
+    print("Đang tiền xử lý văn bản (bước này có thể mất vài phút)...")
+    df['processed_comment'] = preprocess_corpus(df['comment_text'], workers=workers, use_cache=use_cache)
+
+    # TF-IDF chỉ tính một lần; mỗi nhãn chỉ lấy các dòng của mình
+    print("Đang fit TfidfVectorizer dùng chung...")
+    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1, 2))
+    features = vectorizer.fit_transform(df['processed_comment'])
+
+    label_rows = {}
+    for i, label in enumerate(LABEL_COLS):
+        label_rows[label] = undersampled_rows(df, label)
+        print(f"  ({i+1}/{len(LABEL_COLS)}) Nhãn '{label}': {len(label_rows[label])} mẫu huấn luyện")
+
+    arrays = {
+        'data': features.data,
+        'indices': features.indices,
+        'indptr': features.indptr,
+        'shape': np.array(features.shape),
+        'targets': df[list(LABEL_COLS)].to_numpy(),
+    }
+    heads = train_label_heads(_fit_linear_head, arrays, label_rows, workers=workers)
+
+    engine = MultilabelEngine.from_heads(vectorizer, heads)
+
+    print("\nĐã huấn luyện xong. Đang lưu mô hình V5...")
+    save_dir = Path(__file__).parent / 'saved_models'
+    save_dir.mkdir(exist_ok=True)
+    joblib.dump(engine, save_dir / 'multilabel_classifiers.pkl')
+    print(f"✓ Bộ phân loại đa nhãn V5 đã được lưu vào: {save_dir / 'multilabel_classifiers.pkl'}")
+
 if __name__ == "__main__":
-    train_and_save_multilabel_classifier_v4()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Huấn luyện bộ phân loại đa nhãn")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Số tiến trình cho tiền xử lý và huấn luyện (1 = tuần tự)")
+    parser.add_argument('--v4', action='store_true', help="Huấn luyện định dạng V4 (6 pipeline riêng)")
+    parser.add_argument('--no-preprocess-cache', action='store_true',
+                        help="Tiền xử lý lại toàn bộ, không đọc/ghi cache trong .prepcache/")
+    args = parser.parse_args()
+    train = train_and_save_multilabel_classifier_v4 if args.v4 else train_and_save_multilabel_engine_v5
+    train(workers=args.workers, use_cache=not args.no_preprocess_cache)
\ No newline at end of file